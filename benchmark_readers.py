@@ -0,0 +1,73 @@
+"""
+읽기 엔진별 로드 시간 비교
+- 같은 워크북을 사용 가능한 모든 엔진으로 열어 전체 시트를 파싱(header=None)하고 시간을 측정
+- 엔진 간 그리드가 다르면 표시 (모든 엔진이 같은 결과를 내야 함)
+
+사용 예:
+    python benchmark_readers.py corpus/ --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from excel_reader import available_engines, open_workbook
+from profile_extractors import collect_files
+
+def load_all_sheets(file_path, engine):
+    xls = open_workbook(file_path, engine=engine)
+    return {sheet_name: xls.parse(sheet_name, header=None) for sheet_name in xls.sheet_names}
+
+def grid_signature(sheets):
+    # 엔진 간 비교용: 값은 문자열, NaN은 빈 문자열로 통일
+    return {name: df.fillna("").astype(str).values.tolist() for name, df in sheets.items()}
+
+def benchmark_file(file_path, repeat):
+    """
+    :return: {engine: {"median": 초, "min": 초, "same_grid": bool}}
+    """
+    result = {}
+    reference = None
+    for engine in available_engines(file_path):
+        timings = []
+        sheets = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sheets = load_all_sheets(file_path, engine)
+            timings.append(time.perf_counter() - start)
+        signature = grid_signature(sheets)
+        if reference is None:
+            reference = signature
+        result[engine] = {
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "same_grid": signature == reference,
+        }
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="엑셀 읽기 엔진별 로드 시간 비교")
+    parser.add_argument("paths", nargs="+", help="엑셀/CSV 파일 또는 폴더")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    report = {}
+    mismatched = False
+    print(f"{'file':40} {'engine':10} {'median(s)':>10} {'min(s)':>10} {'grid':>6}")
+    for file_path in collect_files(args.paths):
+        report[file_path] = benchmark_file(file_path, max(1, args.repeat))
+        for engine, stat in report[file_path].items():
+            mismatched |= not stat["same_grid"]
+            grid = "same" if stat["same_grid"] else "DIFF"
+            print(f"{os.path.basename(file_path)[:40]:40} {engine:10} {stat['median']:10.4f} {stat['min']:10.4f} {grid:>6}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
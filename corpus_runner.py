@@ -0,0 +1,366 @@
+"""
+실제 문서 구성(인보이스/패킹리스트 엑셀 + OCR 결과 JSON)으로 추출기 성능 회귀 확인
+- manifest(JSON Lines)의 문서를 워커 프로세스 수만큼 나눠(shard) 실행
+- 추출기별 문서당 지연 p50/p95/p99, 초당 문서 수, 워커별 최대 RSS 기록
+- 저장된 골든 결과와 출력 비교 (빨라졌지만 추출 결과가 달라진 경우, 골든에만 있고 이번에 실행되지 않은 결과 표시)
+- 추출 오류, 골든 결과 불일치, 지연 회귀가 있으면 종료 코드 1
+- 리포트(JSON)는 실행 간 비교 가능 (--compare 이전 리포트)
+
+manifest 한 줄 형식 (path 외에는 생략 가능, 상대 경로는 manifest 위치 기준):
+    {"id": "HHI24-152", "path": "invoices/HHI24-152.xlsx", "kind": "excel", "extractors": ["all_fields"]}
+    {"path": "ocr/clova_result.json", "kind": "ocr"}
+
+폴더를 입력으로 주면 엑셀과 OCR 결과 이름(OCR_FILE_PATTERNS, --ocr-pattern)에 맞는 JSON만 모으고,
+이 실행기가 쓰는 --out / --golden / --save-golden / --compare 파일은 제외합니다.
+
+사용 예:
+    python corpus_runner.py corpus/ --write-manifest manifest.jsonl
+    python corpus_runner.py manifest.jsonl --workers 4 --save-golden golden.json --out report.json
+    python corpus_runner.py manifest.jsonl --workers 4 --golden golden.json --compare report.json --out report2.json
+"""
+import argparse
+import contextlib
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+
+import numpy as np
+
+from excel_reader import open_workbook
+from profile_extractors import EXCEL_EXTENSIONS, EXTRACTORS, StageRecorder, collect_files, compare_baseline
+
+# ocr_api_test 폴더의 pdf_router (정규화/텍스트 변환) 사용
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_api_test"))
+from pdf_router import normalize_clova_page, normalize_upstage_pages, pages_to_text
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PERCENTILES = [50, 95, 99]
+
+# 폴더에서 OCR 결과로 수집할 JSON 파일 이름 (clova_test / upstage_test 저장 이름, --ocr-pattern으로 변경)
+OCR_FILE_PATTERNS = ["clova_result*.json", "clova_normalized*.json", "result.json", "result_normalized*.json"]
+
+def load_ocr_pages(data):
+    """
+    OCR 결과 JSON을 정규화 페이지 목록으로 변환합니다.
+    - 정규화 결과 (clova_normalized.json / result_normalized.json): 그대로
+    - Clova 원본 (clova_result.json): 응답 목록 또는 응답 하나, 좌표는 이미지 픽셀 그대로
+    - Upstage 원본 (result.json): 응답 하나 또는 목록
+    """
+    responses = data if isinstance(data, list) else [data]
+    if responses and all(isinstance(item, dict) and "words" in item and "page" in item for item in responses):
+        return responses
+    pages = []
+    for response in responses:
+        if "images" in response:
+            info = (response["images"][0].get("convertedImageInfo") or {}) if response["images"] else {}
+            # dpi=72이면 픽셀 좌표를 그대로 사용
+            pages.append(normalize_clova_page(response, len(pages) + 1, info.get("width", 0), info.get("height", 0), dpi=72))
+        elif "pages" in response:
+            page_numbers = [len(pages) + i + 1 for i in range(len(response["pages"]))]
+            page_sizes = {n: (page.get("width", 0), page.get("height", 0)) for n, page in zip(page_numbers, response["pages"])}
+            normalized = normalize_upstage_pages(response, page_numbers, page_sizes)
+            pages.extend(normalized[n] for n in page_numbers if n in normalized)
+        else:
+            raise ValueError("OCR 결과 형식을 알 수 없습니다 (images/pages 없음)")
+    return pages
+
+def run_ocr_text(file_path, engine=None):
+    with open(file_path, encoding="utf-8") as f:
+        pages = load_ocr_pages(json.load(f))
+    return pages_to_text(pages)
+
+OCR_EXTRACTORS = {"ocr_text": run_ocr_text}
+
+def run_excel_extractor(extractor):
+    def run(file_path, engine=None):
+        xls = open_workbook(file_path, engine=engine)
+        return EXTRACTORS[extractor](xls, StageRecorder())
+    return run
+
+RUNNERS = {
+    "excel": {name: run_excel_extractor(name) for name in EXTRACTORS},
+    "ocr": OCR_EXTRACTORS,
+}
+
+def document_kind(file_path):
+    if file_path.lower().endswith(".json"):
+        return "ocr"
+    if file_path.lower().endswith(EXCEL_EXTENSIONS):
+        return "excel"
+    return None
+
+def build_manifest(paths, ocr_patterns=None, exclude=None):
+    """
+    폴더/파일 목록에서 manifest 항목을 만듭니다. (엑셀 + OCR JSON)
+    :param ocr_patterns: 폴더에서 OCR 결과로 수집할 JSON 파일 이름 패턴 (None이면 OCR_FILE_PATTERNS, 직접 지정한 파일은 이름과 관계없이 포함)
+    :param exclude: 제외할 파일 경로 (이 실행기가 쓰는 리포트/골든/manifest 파일)
+    """
+    ocr_patterns = OCR_FILE_PATTERNS if ocr_patterns is None else ocr_patterns
+    exclude = {os.path.abspath(path) for path in exclude or []}
+    entries = []
+    for path in paths:
+        files = collect_files([path])
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if any(fnmatch.fnmatch(name.lower(), pattern) for pattern in ocr_patterns))
+        for file_path in files:
+            kind = document_kind(file_path)
+            if kind is not None and os.path.abspath(file_path) not in exclude:
+                entries.append({"id": file_path, "path": file_path, "kind": kind})
+    return entries
+
+def read_manifest(manifest_path):
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            path = entry["path"] if os.path.isabs(entry["path"]) else os.path.join(base, entry["path"])
+            entries.append({
+                "id": entry.get("id", entry["path"]),
+                "path": path,
+                "kind": entry.get("kind") or document_kind(path),
+                "extractors": entry.get("extractors"),
+            })
+    return entries
+
+def canonical_output(output):
+    # 골든 비교용: 키 정렬 JSON 문자열
+    return json.dumps(output, ensure_ascii=False, sort_keys=True, default=str)
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_shard(task):
+    """
+    워커 프로세스에서 문서 묶음 하나를 실행합니다.
+    :return: {"worker", "records": [...], "peak_rss_mb"}
+    """
+    worker, entries, extractors, engine = task
+    records = []
+    for entry in entries:
+        runners = RUNNERS.get(entry["kind"], {})
+        names = entry.get("extractors") or [name for name in runners if extractors is None or name in extractors]
+        for name in names:
+            output = error = None
+            start = time.perf_counter()
+            try:
+                # 추출기의 디버그 print는 출력하지 않음
+                with contextlib.redirect_stdout(io.StringIO()):
+                    output = runners[name](entry["path"], engine)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - start
+            text = canonical_output(output) if error is None else None
+            records.append({
+                "id": entry["id"],
+                "extractor": name,
+                "seconds": seconds,
+                "error": error,
+                "sha1": hashlib.sha1(text.encode("utf-8")).hexdigest() if text is not None else None,
+                "output": text,
+            })
+    return {"worker": worker, "records": records, "peak_rss_mb": peak_rss_mb()}
+
+def latency_stats(values):
+    if not values:
+        return {}
+    stats = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    stats["mean"] = float(np.mean(values))
+    stats["max"] = float(np.max(values))
+    return stats
+
+def summarize(records, wall_seconds):
+    """
+    추출기별/문서별 지연 통계
+    """
+    by_extractor = defaultdict(list)
+    by_document = defaultdict(float)
+    errors = defaultdict(int)
+    for record in records:
+        by_document[record["id"]] += record["seconds"]
+        if record["error"]:
+            errors[record["extractor"]] += 1
+        else:
+            by_extractor[record["extractor"]].append(record["seconds"])
+
+    extractors = {}
+    for name in sorted(set(by_extractor) | set(errors)):
+        seconds = by_extractor.get(name, [])
+        extractors[name] = {
+            "count": len(seconds),
+            "errors": errors.get(name, 0),
+            # 단일 워커 기준 처리량 (추출기 실행 시간 합 기준)
+            "docs_per_second": len(seconds) / sum(seconds) if sum(seconds) > 0 else None,
+            **latency_stats(seconds),
+        }
+    return {
+        "documents": len(by_document),
+        "wall_seconds": wall_seconds,
+        "docs_per_second": len(by_document) / wall_seconds if wall_seconds > 0 else None,
+        "document_latency": latency_stats(list(by_document.values())),
+        "extractors": extractors,
+    }
+
+def comparable_summary(summary):
+    # 이전 리포트와 비교할 값 (모두 클수록 나쁨): 추출기별 p50/p95/p99, 문서 지연 p95
+    values = {}
+    for name, stat in summary["extractors"].items():
+        for p in PERCENTILES:
+            if f"p{p}" in stat:
+                values[f"{name}/p{p}"] = stat[f"p{p}"]
+    if "p95" in summary["document_latency"]:
+        values["document/p95"] = summary["document_latency"]["p95"]
+    return values
+
+def check_golden(records, golden):
+    """
+    :return: {"checked", "mismatched": [key, ...], "missing": [key, ...], "unmatched": [key, ...]}
+        missing: 골든 결과가 없는 레코드, unmatched: 대응하는 레코드가 없는 골든 결과 (문서/추출기가 빠진 경우)
+    """
+    mismatched = []
+    missing = []
+    checked = 0
+    seen = set()
+    for record in records:
+        key = f"{record['id']}::{record['extractor']}"
+        seen.add(key)
+        expected = golden.get(key)
+        if expected is None:
+            missing.append(key)
+            continue
+        checked += 1
+        if record["error"] or record["sha1"] != expected["sha1"]:
+            mismatched.append(key)
+    unmatched = [key for key in golden if key not in seen]
+    return {"checked": checked, "mismatched": mismatched, "missing": missing, "unmatched": unmatched}
+
+def run_corpus(entries, workers=1, extractors=None, engine=None):
+    """
+    문서를 workers개 shard로 나눠 실행합니다. (문서 순서대로 번갈아 배정)
+    :return: (records, workers_info, wall_seconds)
+    """
+    workers = max(1, min(workers, len(entries) or 1))
+    tasks = [(i, entries[i::workers], extractors, engine) for i in range(workers)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_shard(tasks[0])]
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(run_shard, tasks)
+    wall_seconds = time.perf_counter() - start
+    records = [record for result in results for record in result["records"]]
+    workers_info = [{"worker": r["worker"], "documents": len(tasks[r["worker"]][1]), "peak_rss_mb": r["peak_rss_mb"]} for r in results]
+    return records, workers_info, wall_seconds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="문서 코퍼스 성능 회귀 실행기")
+    parser.add_argument("inputs", nargs="+", help="manifest(.jsonl) 또는 엑셀/OCR JSON 파일·폴더")
+    parser.add_argument("--write-manifest", help="입력 파일·폴더로 manifest를 만들어 저장하고 종료")
+    parser.add_argument("--ocr-pattern", action="append",
+                        help=f"폴더에서 수집할 OCR 결과 JSON 이름 패턴 (여러 번 지정 가능, 기본: {' '.join(OCR_FILE_PATTERNS)})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--extractor", action="append", help="실행할 추출기 (여러 번 지정 가능, 기본: 문서 종류별 전체)")
+    parser.add_argument("--engine", help="엑셀 읽기 엔진 (기본: 자동 선택)")
+    parser.add_argument("--out", help="리포트 JSON 저장 경로")
+    parser.add_argument("--golden", help="비교할 골든 결과 JSON")
+    parser.add_argument("--save-golden", help="이번 출력을 골든 결과로 저장")
+    parser.add_argument("--compare", help="비교할 이전 리포트 JSON")
+    parser.add_argument("--threshold", type=float, default=20.0, help="허용 회귀 비율(%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="비교에서 제외할 짧은 지연 기준(초)")
+    args = parser.parse_args(argv)
+
+    if len(args.inputs) == 1 and args.inputs[0].endswith(".jsonl"):
+        entries = read_manifest(args.inputs[0])
+    else:
+        own_files = [args.out, args.golden, args.save_golden, args.compare, args.write_manifest]
+        entries = build_manifest(args.inputs, args.ocr_pattern, [path for path in own_files if path])
+    if args.write_manifest:
+        with open(args.write_manifest, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"manifest 저장: {args.write_manifest} ({len(entries)}건)")
+        return 0
+
+    records, workers_info, wall_seconds = run_corpus(entries, args.workers, args.extractor, args.engine)
+    summary = summarize(records, wall_seconds)
+
+    print(f"문서 {summary['documents']}건, {wall_seconds:.2f}초, 초당 {summary['docs_per_second'] or 0:.2f}건 (워커 {len(workers_info)}개)")
+    print(f"{'extractor':18} {'count':>6} {'err':>4} {'p50(s)':>8} {'p95(s)':>8} {'p99(s)':>8} {'docs/s':>8}")
+    for name, stat in summary["extractors"].items():
+        print(f"{name:18} {stat['count']:6} {stat['errors']:4} {stat.get('p50', 0):8.4f} {stat.get('p95', 0):8.4f} "
+              f"{stat.get('p99', 0):8.4f} {stat['docs_per_second'] or 0:8.2f}")
+    rss = [w["peak_rss_mb"] for w in workers_info if w["peak_rss_mb"] is not None]
+    if rss:
+        print(f"워커 최대 RSS: {max(rss):.1f}MB")
+
+    errors = [r for r in records if r["error"]]
+    for r in errors:
+        print(f"[오류] {r['id']}::{r['extractor']}: {r['error']}")
+    failed = bool(errors)
+    golden_result = None
+    if args.golden:
+        with open(args.golden, encoding="utf-8") as f:
+            golden_result = check_golden(records, json.load(f)["outputs"])
+        for key in golden_result["mismatched"]:
+            print(f"[출력 변경] {key}")
+        for key in golden_result["unmatched"]:
+            print(f"[실행 안 됨] {key}")
+        if golden_result["missing"]:
+            print(f"골든 결과 없음: {len(golden_result['missing'])}건")
+        failed |= bool(golden_result["mismatched"] or golden_result["unmatched"])
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)["summary"]
+        regressions = compare_baseline(comparable_summary(summary), comparable_summary(previous), args.threshold, args.min_seconds)
+        for r in regressions:
+            print(f"[회귀] {r['stage']}: {r['baseline']:.4f}초 -> {r['current']:.4f}초 (+{r['change_pct']:.1f}%)")
+        failed |= bool(regressions)
+
+    if args.save_golden:
+        outputs = {f"{r['id']}::{r['extractor']}": {"sha1": r["sha1"], "output": r["output"]} for r in records if not r["error"]}
+        with open(args.save_golden, "w", encoding="utf-8") as f:
+            json.dump({"outputs": outputs}, f, ensure_ascii=False, indent=2)
+
+    if args.out:
+        report = {
+            "run": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "workers": workers_info,
+                "engine": args.engine,
+            },
+            "summary": summary,
+            "golden": golden_result,
+            "regressions": regressions,
+            # 리포트에는 출력 본문 대신 해시만 저장
+            "documents": [{key: value for key, value in r.items() if key != "output"} for r in records],
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+엑셀/CSV 읽기 엔진 선택
+- openpyxl: .xlsx/.xlsm 기본 엔진 (pandas가 read-only 모드로 읽음)
+- calamine: Rust 기반 고속 엔진 (python-calamine 필요), .xls/.ods/.xlsb 포함
+- csv: .csv/.tsv/.txt 를 시트 하나짜리 워크북으로 취급
+- pandas: pd.ExcelFile 기본 엔진 (.xls는 xlrd) - calamine이 없을 때 .xls/.xlsb/.ods 대체 경로
+
+open_workbook()이 반환하는 객체는 pd.ExcelFile과 같은 sheet_names / parse()를 제공하므로
+기존 `xls = pd.ExcelFile(file_path)` 자리에 그대로 사용할 수 있습니다.
+시트는 실제 데이터 범위만 읽으며(read_grid), 셀 수/시간 한도를 넘는 시트는 읽은 데까지만 사용합니다.
+"""
+import csv
+import datetime
+import importlib.util
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+ENGINES = ("openpyxl", "calamine", "csv", "pandas")
+
+# 이 크기 이상의 .xlsx는 calamine이 설치되어 있으면 calamine으로 읽음
+CALAMINE_MIN_BYTES = 256 * 1024
+
+CSV_EXTENSIONS = (".csv", ".tsv", ".txt")
+OPENPYXL_EXTENSIONS = (".xlsx", ".xlsm")
+CALAMINE_ONLY_EXTENSIONS = (".xls", ".xlsb", ".ods")
+
+# 시트별 읽기 한도 (서식만 수십만 행/수백 열에 적용된 파일 대비)
+MAX_CELLS = 5_000_000       # 시트당 최대 셀 수
+MAX_SECONDS = 30.0          # 시트당 최대 읽기 시간(초)
+# 마지막 데이터 행 뒤로 연속 빈 행이 이만큼이면 읽기 종료 (opt-in, None이면 끝까지 읽고 뒤쪽 빈 행만 버림)
+MAX_EMPTY_ROWS = None
+
+# 일본/한국 거래처 CSV 대응 (앞에서부터 시도)
+CSV_ENCODINGS = ("utf-8-sig", "cp932", "cp949")
+
+def calamine_available():
+    return importlib.util.find_spec("python_calamine") is not None
+
+def available_engines(file_path):
+    """
+    파일 형식상 사용할 수 있는(설치된) 엔진 목록
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in CSV_EXTENSIONS:
+        return ["csv"]
+    engines = []
+    if ext in OPENPYXL_EXTENSIONS:
+        engines.append("openpyxl")
+    if calamine_available() and (ext in OPENPYXL_EXTENSIONS or ext in CALAMINE_ONLY_EXTENSIONS):
+        engines.append("calamine")
+    if ext in CALAMINE_ONLY_EXTENSIONS:
+        engines.append("pandas")
+    return engines
+
+def choose_engine(file_path):
+    """
+    확장자와 파일 크기로 엔진을 고릅니다.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in CSV_EXTENSIONS:
+        return "csv"
+    if ext in CALAMINE_ONLY_EXTENSIONS:
+        # calamine이 없으면 기존처럼 pd.ExcelFile 기본 엔진(.xls는 xlrd)으로 읽음
+        return "calamine" if calamine_available() else "pandas"
+    if calamine_available() and os.path.getsize(file_path) >= CALAMINE_MIN_BYTES:
+        return "calamine"
+    return "openpyxl"
+
+class SheetBudgetWarning(UserWarning):
+    """
+    시트 읽기가 셀 수/시간 한도에 걸려 중간에 멈췄을 때 발생하는 경고
+    """
+
+def is_blank(value):
+    # xls.parse와 같이 값이 없는 셀만 빈 셀로 봄 (공백 문자열 셀은 값으로 유지)
+    return value is None or (isinstance(value, str) and value == "")
+
+def read_grid(rows, max_cells=MAX_CELLS, max_seconds=MAX_SECONDS, max_empty_rows=MAX_EMPTY_ROWS, trim_leading=False, sheet_name=None):
+    """
+    행 iterator에서 실제 데이터 범위만 읽습니다.
+    - 각 행의 뒤쪽 빈 셀과 마지막 데이터 행 이후의 빈 행은 버림
+    - max_empty_rows를 지정하면 마지막 데이터 행 뒤로 빈 행이 그만큼 이어질 때 더 읽지 않음
+      (서식만 적용된 범위를 빨리 건너뛰는 opt-in 설정, 그보다 긴 빈 구간 뒤의 데이터는 읽지 않음)
+    - 셀 수/시간 한도를 넘으면 읽은 데까지만 반환하고 SheetBudgetWarning (info["truncated"]에 사유)
+    - trim_leading=True이면 앞쪽 빈 행/열도 잘라내고 row_offset/col_offset에 기록
+    :return: (data, info)
+    """
+    data = []
+    last_row = -1
+    first_col = None
+    cells = 0
+    truncated = None
+    start = time.perf_counter()
+    for row_number, row in enumerate(rows):
+        row = list(row)
+        cells += len(row)
+        width = len(row)
+        while width and is_blank(row[width - 1]):
+            width -= 1
+        data.append(row[:width])
+        if width:
+            last_row = row_number
+            leading = next(i for i, value in enumerate(row) if not is_blank(value))
+            first_col = leading if first_col is None else min(first_col, leading)
+        elif max_empty_rows is not None and row_number - last_row > max_empty_rows:
+            break
+        if cells > max_cells:
+            truncated = f"셀 수 한도 초과 ({max_cells})"
+        elif time.perf_counter() - start > max_seconds:
+            truncated = f"시간 한도 초과 ({max_seconds}초)"
+        if truncated:
+            warnings.warn(f"시트 '{sheet_name}' 읽기 중단: {truncated}, {row_number + 1}행까지만 사용", SheetBudgetWarning)
+            break
+
+    data = data[:last_row + 1]
+    row_offset = col_offset = 0
+    if trim_leading and data:
+        row_offset = next(i for i, row in enumerate(data) if row)
+        col_offset = first_col or 0
+        data = [row[col_offset:] for row in data[row_offset:]]
+
+    # pandas와 같이 가장 긴 행 길이로 맞춤
+    if data:
+        max_width = max(len(row) for row in data)
+        data = [row + [""] * (max_width - len(row)) for row in data]
+
+    info = {
+        "row_offset": row_offset,
+        "col_offset": col_offset,
+        "rows_read": len(data),
+        "cells_read": cells,
+        "truncated": truncated,
+    }
+    return data, info
+
+def grid_to_frame(data, header=0):
+    """
+    read_grid 결과를 xls.parse(sheet_name, header=header)와 같은 DataFrame으로 변환합니다.
+    """
+    if not data:
+        return pd.DataFrame()
+    # pandas read_excel과 같은 파서/옵션 사용 (빈 행 유지)
+    return TextParser(data, header=header, skip_blank_lines=False).read()
+
+def convert_openpyxl_cell(cell):
+    # pandas openpyxl 엔진과 같은 변환 (정수 값 float -> int, 오류 셀 -> NaN)
+    if cell.value is None:
+        return ""
+    if cell.data_type == "e":
+        return np.nan
+    if cell.data_type == "n":
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+def convert_calamine_cell(value):
+    # pandas calamine 엔진과 같은 변환
+    if isinstance(value, float):
+        as_int = int(value)
+        return as_int if as_int == value else value
+    if isinstance(value, datetime.datetime) or isinstance(value, datetime.date):
+        return pd.Timestamp(value)
+    if isinstance(value, datetime.timedelta):
+        return pd.Timedelta(value)
+    return value
+
+class ExcelWorkbook:
+    """
+    openpyxl(read-only) / calamine 워크북
+    parse()는 read_grid로 실제 데이터 범위만 읽고, 범위 정보는 df.attrs에 남깁니다.
+    """
+    def __init__(self, file_path, engine, limits=None):
+        self.file_path = file_path
+        self.engine = engine
+        self.limits = limits or {}
+        if engine == "openpyxl":
+            from openpyxl import load_workbook
+            self._book = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+            self.sheet_names = [sheet.title for sheet in self._book.worksheets]
+        else:
+            from python_calamine import CalamineWorkbook, SheetTypeEnum
+            self._book = CalamineWorkbook.from_path(file_path)
+            self.sheet_names = [sheet.name for sheet in self._book.sheets_metadata if sheet.typ == SheetTypeEnum.WorkSheet]
+
+    def iter_rows(self, sheet_name):
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"시트를 찾을 수 없습니다: {sheet_name}")
+        if self.engine == "openpyxl":
+            sheet = self._book[sheet_name]
+            # 파일에 기록된 dimension은 서식 범위 때문에 부풀려져 있을 수 있으므로 무시
+            sheet.reset_dimensions()
+            for row in sheet.rows:
+                yield [convert_openpyxl_cell(cell) for cell in row]
+        else:
+            sheet = self._book.get_sheet_by_name(sheet_name)
+            # calamine은 시트를 한 번에 읽으므로 셀 수 한도는 읽기 전에 행 수로 적용
+            max_cells = self.limits.get("max_cells", MAX_CELLS)
+            width = max(sheet.total_width, 1)
+            nrows = None if sheet.total_height * width <= max_cells else max_cells // width + 1
+            for row in sheet.to_python(skip_empty_area=False, nrows=nrows):
+                yield [convert_calamine_cell(value) for value in row]
+
+    def parse(self, sheet_name, header=0):
+        data, info = read_grid(self.iter_rows(sheet_name), sheet_name=sheet_name, **self.limits)
+        df = grid_to_frame(data, header)
+        df.attrs.update(info)
+        return df
+
+class CsvWorkbook:
+    """
+    CSV 파일을 파일명을 시트 이름으로 하는 단일 시트 워크북으로 읽습니다.
+    """
+    def __init__(self, file_path, limits=None):
+        self.file_path = file_path
+        self.engine = "csv"
+        self.limits = limits or {}
+        self.sheet_names = [os.path.splitext(os.path.basename(file_path))[0]]
+        self.sep = "\t" if file_path.lower().endswith(".tsv") else ","
+
+    def iter_rows(self, sheet_name):
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"시트를 찾을 수 없습니다: {sheet_name}")
+        for encoding in CSV_ENCODINGS:
+            try:
+                with open(self.file_path, encoding=encoding, newline="") as f:
+                    rows = list(csv.reader(f, delimiter=self.sep))
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError(f"CSV 인코딩을 판별할 수 없습니다: {self.file_path}")
+        return iter(rows)
+
+    def parse(self, sheet_name, header=0):
+        data, info = read_grid(self.iter_rows(sheet_name), sheet_name=sheet_name, **self.limits)
+        df = grid_to_frame(data, header)
+        df.attrs.update(info)
+        return df
+
+class PandasWorkbook:
+    """
+    pd.ExcelFile 기본 엔진으로 읽는 워크북 (calamine이 없을 때 .xls 등)
+    셀 값은 pandas 엔진이 변환한 그대로 받아 read_grid / grid_to_frame을 거치므로 parse() 결과는 다른 엔진과 같은 규칙입니다.
+    """
+    def __init__(self, file_path, limits=None):
+        self.file_path = file_path
+        self.engine = "pandas"
+        self.limits = limits or {}
+        self._book = pd.ExcelFile(file_path)
+        self.sheet_names = self._book.sheet_names
+
+    def iter_rows(self, sheet_name):
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"시트를 찾을 수 없습니다: {sheet_name}")
+        # 헤더/타입 추론 없이 셀 값 그대로 (빈 셀은 "")
+        df = self._book.parse(sheet_name, header=None, dtype=object, na_filter=False)
+        return iter(df.values.tolist())
+
+    def parse(self, sheet_name, header=0):
+        data, info = read_grid(self.iter_rows(sheet_name), sheet_name=sheet_name, **self.limits)
+        df = grid_to_frame(data, header)
+        df.attrs.update(info)
+        return df
+
+def open_workbook(file_path, engine=None, max_cells=MAX_CELLS, max_seconds=MAX_SECONDS, max_empty_rows=MAX_EMPTY_ROWS, trim_leading=False):
+    """
+    워크북을 엽니다.
+    :param engine: None이면 choose_engine()으로 자동 선택, 또는 ENGINES 중 하나
+    :param max_cells / max_seconds: 시트당 읽기 한도 (넘으면 읽은 데까지만 사용)
+    :param max_empty_rows: 마지막 데이터 뒤 연속 빈 행이 이만큼이면 읽기 종료 (None이면 끝까지 읽음)
+    :param trim_leading: 앞쪽 빈 행/열도 잘라냄 (df.attrs["row_offset"], ["col_offset"]에 기록)
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
+    if engine is None:
+        engine = choose_engine(file_path)
+    if engine not in ENGINES:
+        raise ValueError(f"지원하지 않는 엔진입니다: {engine} (사용 가능: {', '.join(ENGINES)})")
+    limits = {"max_cells": max_cells, "max_seconds": max_seconds, "max_empty_rows": max_empty_rows, "trim_leading": trim_leading}
+    if engine == "csv":
+        return CsvWorkbook(file_path, limits)
+    if engine == "pandas":
+        return PandasWorkbook(file_path, limits)
+    return ExcelWorkbook(file_path, engine, limits)
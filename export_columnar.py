@@ -0,0 +1,176 @@
+"""
+find_table_value / group_by_main_keys_and_collect_por_no 결과를 컬럼형(Arrow IPC / Parquet)으로 저장
+- 중첩 dict를 평탄화한 고정 스키마 (무게/치수/부피는 float64, POR No.는 list<string>)
+- 여러 파일의 결과를 batch_size 단위 RecordBatch로 모아 하나의 파일에 기록
+
+pyarrow가 필요합니다: pip install pyarrow
+
+사용 예:
+    python export_columnar.py corpus/ --out tables.parquet
+    python export_columnar.py corpus/ --out tables.arrow --format ipc
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import unicodedata
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DESCRIPTION_FIELDS = [
+    "contract_no", "por_no", "eng_model", "company_serial", "drw_no", "parts_name", "material_no"
+]
+DESCRIPTION_NUMERIC_FIELDS = ["qty", "price", "amount"]
+
+def build_schema():
+    fields = [
+        ("source_file", pa.string()),
+        ("sheet_name", pa.string()),
+        ("case_no", pa.string()),
+        ("package_style", pa.string()),
+    ]
+    fields += [(name, pa.string()) for name in DESCRIPTION_FIELDS]
+    fields += [(name, pa.float64()) for name in DESCRIPTION_NUMERIC_FIELDS]
+    fields += [
+        ("por_no_list", pa.list_(pa.string())),
+        ("n_w_kgs", pa.float64()),
+        ("g_w_kgs", pa.float64()),
+        ("dimension_l", pa.float64()),
+        ("dimension_w", pa.float64()),
+        ("dimension_h", pa.float64()),
+        ("mment_m3", pa.float64()),
+    ]
+    return pa.schema(fields)
+
+def to_float(value):
+    # 전각 숫자/쉼표 처리, 숫자가 아니면 None (null)
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKC", str(value)).replace(",", "").strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def flatten_item(item, source_file=None, sheet_name=None):
+    """
+    find_table_value 항목(또는 그룹 결과) 하나를 스키마 컬럼 dict로 평탄화합니다.
+    """
+    desc = item.get("description", {}) or {}
+    por_no_list = desc.get("por_no_list")
+    if por_no_list is None:
+        por_no_list = [desc["por_no"]] if desc.get("por_no") else []
+    dimension = item.get("dimension", {}) or {}
+
+    row = {
+        "source_file": source_file,
+        "sheet_name": sheet_name,
+        "case_no": item.get("case_no") or None,
+        "package_style": (item.get("package", {}) or {}).get("style") or None,
+    }
+    for name in DESCRIPTION_FIELDS:
+        row[name] = desc.get(name) or None
+    for name in DESCRIPTION_NUMERIC_FIELDS:
+        row[name] = to_float(desc.get(name))
+    row["por_no_list"] = list(por_no_list)
+    row["n_w_kgs"] = to_float((item.get("n_w", {}) or {}).get("kgs"))
+    row["g_w_kgs"] = to_float((item.get("g_w", {}) or {}).get("kgs"))
+    row["dimension_l"] = to_float(dimension.get("l"))
+    row["dimension_w"] = to_float(dimension.get("w"))
+    row["dimension_h"] = to_float(dimension.get("h"))
+    row["mment_m3"] = to_float((item.get("mment", {}) or {}).get("m3"))
+    return row
+
+class ColumnarWriter:
+    """
+    평탄화된 행을 모아 batch_size마다 RecordBatch로 기록합니다.
+    :param file_format: "parquet" 또는 "ipc" (Arrow IPC 파일)
+    """
+    def __init__(self, path, file_format="parquet", batch_size=10000):
+        if pa is None:
+            raise ImportError("컬럼형 저장에는 pyarrow가 필요합니다: pip install pyarrow")
+        if file_format not in ("parquet", "ipc"):
+            raise ValueError(f"지원하지 않는 형식입니다: {file_format}")
+        self.path = path
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.schema = build_schema()
+        self.rows_written = 0
+        self._rows = []
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write_items(self, items, source_file=None, sheet_name=None):
+        for item in items:
+            self._rows.append(flatten_item(item, source_file, sheet_name))
+            if len(self._rows) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        batch = pa.RecordBatch.from_pylist(self._rows, schema=self.schema)
+        if self.file_format == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def export_files(file_paths, out_path, file_format="parquet", batch_size=10000, engine=None):
+    """
+    여러 엑셀 파일에서 테이블을 추출(그룹 결과)해 하나의 컬럼형 파일로 저장합니다.
+    :return: 기록한 행 수
+    """
+    from excel_reader import open_workbook
+    from find_table_value_test import find_table_value, group_by_main_keys_and_collect_por_no
+
+    with ColumnarWriter(out_path, file_format, batch_size) as writer:
+        for file_path in file_paths:
+            try:
+                xls = open_workbook(file_path, engine=engine)
+                # 추출기의 디버그 print는 출력하지 않음
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for sheet_name in xls.sheet_names:
+                        df = xls.parse(sheet_name, header=None)
+                        result = find_table_value(df)
+                        if result:
+                            grouped_result = group_by_main_keys_and_collect_por_no(result)
+                            writer.write_items(grouped_result, os.path.basename(file_path), sheet_name)
+                            break
+            except Exception as e:
+                print(f"오류: {file_path}: {e}", file=sys.stderr)
+    return writer.rows_written
+
+if __name__ == "__main__":
+    from profile_extractors import collect_files
+
+    parser = argparse.ArgumentParser(description="테이블 추출 결과를 Arrow IPC / Parquet으로 저장")
+    parser.add_argument("paths", nargs="+", help="엑셀 파일 또는 폴더")
+    parser.add_argument("--out", required=True, help="출력 파일 경로")
+    parser.add_argument("--format", choices=["parquet", "ipc"], default="parquet")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    rows = export_files(collect_files(args.paths), args.out, args.format, args.batch_size)
+    print(f"{rows}행 저장 완료: {args.out}")
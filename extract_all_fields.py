@@ -2,83 +2,117 @@ import pandas as pd
 import os
 import json
 import warnings
+from excel_reader import open_workbook
+from fuzzy_match import bounded_distance, resolve_max_dist
+from party_blocks import PartyBlocks
+from search_region import FieldResolver, region_bounds, top_block_regions
 
 # applymap 경고 무시
 warnings.filterwarnings('ignore', category=FutureWarning, message='.*applymap.*')
 
-def extract_all_fields(df):
+# Shipper / Consignee (여러 줄) 헤더 키워드
+MULTILINE_KEYWORDS = ["shipper", "consignee"]
+
+# 나머지 필드 (한 셀 옆) 키워드
+KEYWORD_MAP = {
+    "invoice_no": ["invoice no", "invoice number", "inv no", "請求書番号", "invoice no."],
+    "payment": ["payment", "支払い", "terms", "payment term"],
+    "freight": ["freight", "運賃", "shipping method"],
+    "airport": ["airport", "空港", "成田空港"],
+    "invoice_date": ["invoice date", "弊社出荷日", "出荷日"],
+    "arrival_date": ["arrival date", "御社搬入日", "到着日"]
+}
+
+# 검색 영역을 지정할 수 있는 필드 (search_regions 키)
+SEARCH_FIELDS = MULTILINE_KEYWORDS + list(KEYWORD_MAP)
+
+# 상단 50행만 검색하는 프리셋 (opt-in, 기본은 시트 전체)
+SEARCH_REGIONS = top_block_regions(SEARCH_FIELDS)
+
+def normalize_label(value):
+    return str(value).lower().strip().replace("：", "").replace(":", "")
+
+def extract_all_fields(df, layout_cache=None, search_regions=None):
     """
     엑셀 데이터에서 다양한 필드들을 추출합니다.
     - Shipper/Consignee: 여러 줄 정보
     - 기타 필드: 키워드 옆 셀의 값
+    layout_cache: LayoutCache를 주면 같은 레이아웃에서 찾았던 좌표를 먼저 확인
+    search_regions: 필드별 검색 영역 (None이면 시트 전체, 상단 블록만 검색하려면 SEARCH_REGIONS)
     """
-    # applymap 대신 map 사용
-    df_str = df.astype(str).fillna("").map(lambda x: x.strip().lower())
+    if search_regions is None:
+        search_regions = {}
+    fingerprint = layout_cache.fingerprint(df) if layout_cache is not None else None
+
+    def joined_row(idx):
+        return " ".join(df.loc[idx].fillna("").astype(str).str.lower().tolist())
+
+    # 1. Shipper / Consignee 헤더 행 찾기 (캐시 확인 후 남은 키워드만 검색)
+    multiline_rows = {}
+    pending = {}
+    for keyword in MULTILINE_KEYWORDS:
+        if layout_cache is not None:
+            hit, idx = layout_cache.probe(fingerprint, "all_fields", f"multiline:{keyword}",
+                                          lambda idx: idx in df.index and keyword in joined_row(idx))
+            if hit:
+                multiline_rows[keyword] = idx
+                continue
+        pending[keyword] = region_bounds(search_regions.get(keyword), *df.shape)
+
+    # 검색 영역 + 헤더 행 아래 4행까지를 한 번에 문자열 배열/키워드 hit 행렬로 만들어 헤더 행 검색과 블록 추출에 같이 사용
+    spans = [bounds[:2] for bounds in pending.values()]
+    spans += [(df.index.get_loc(idx), df.index.get_loc(idx) + 1) for idx in multiline_rows.values()]
+    party_blocks = None
+    if spans:
+        party_blocks = PartyBlocks(df, MULTILINE_KEYWORDS, min(start for start, _ in spans), max(end for _, end in spans) + 4)
+    for keyword, bounds in pending.items():
+        row_pos = party_blocks.first_row([keyword], bounds)
+        if row_pos is not None:
+            multiline_rows[keyword] = df.index[row_pos]
+    if layout_cache is not None:
+        for keyword in pending:
+            idx = multiline_rows.get(keyword)
+            layout_cache.record(fingerprint, "all_fields", f"multiline:{keyword}", None if idx is None else int(idx))
 
-    # 1. Shipper / Consignee 추출 (여러 줄)
     def extract_multiline(keyword):
-        for idx, row in df.iterrows():
-            joined = " ".join(row.fillna("").astype(str).str.lower().tolist())
-            if keyword in joined:
-                lines = []
-
-                # 1. 같은 행에서 키워드 오른쪽 셀들의 정보 추출
-                row_cells = [cell if str(cell).lower() != "nan" else "" for cell in row.fillna("").tolist()]
-                # 키워드가 있는 셀의 인덱스를 찾기
-                keyword_col_idx = None
-                for col_idx, cell in enumerate(row_cells):
-                    if keyword in str(cell).lower():
-                        keyword_col_idx = col_idx
-                        break
-
-                # 키워드 오른쪽 셀들의 정보 추출 (최대 3칸까지)
-                if keyword_col_idx is not None:
-                    for col_offset in range(1, 4):  # 오른쪽 1~3칸
-                        if keyword_col_idx + col_offset < len(row_cells):
-                            cell_value = str(row_cells[keyword_col_idx + col_offset]).strip()
-                            if cell_value and cell_value.lower() != "nan" and keyword not in cell_value.lower():
-                                lines.append(cell_value)
-
-                # 2. 키워드 아래 행들의 정보 추출
-                for offset in range(1, 5):
-                    if idx + offset >= len(df): break
-                    row_cells = [cell if str(cell).lower() != "nan" else "" for cell in df.iloc[idx + offset].fillna("").tolist()]
-                    line = " ".join(row_cells).strip()
-                    if line and keyword not in line.lower():
-                        lines.append(line)
-                    elif not line:
-                        break
-                return lines
-        return []
+        if keyword not in multiline_rows:
+            return []
+        # 키워드 오른쪽 최대 3칸 + 아래 최대 4행
+        return party_blocks.block(df.index.get_loc(multiline_rows[keyword]), [keyword])
 
     shipper_info = extract_multiline("shipper")
     consignee_info = extract_multiline("consignee")
 
     # 2. 나머지 필드 추출 (한 셀 옆)
-    keyword_map = {
-        "invoice_no": ["invoice no", "invoice number", "inv no", "請求書番号", "invoice no."],
-        "payment": ["payment", "支払い", "terms", "payment term"],
-        "freight": ["freight", "運賃", "shipping method"],
-        "airport": ["airport", "空港", "成田空港"],
-        "invoice_date": ["invoice date", "弊社出荷日", "出荷日"],
-        "arrival_date": ["arrival date", "御社搬入日", "到着日"]
-    }
+    def verify_position(position):
+        # 캐시 좌표의 셀에 그때 매칭된 키워드가 여전히 있는지 확인
+        row_idx, col_idx, keyword = position
+        if row_idx >= len(df) or col_idx >= df.shape[1]:
+            return False
+        return bounded_distance(keyword, normalize_label(df.iat[row_idx, col_idx]), resolve_max_dist(keyword)) is not None
 
     simple_fields = {}
-    # 1. 키워드 위치 저장
+    # 1. 키워드 위치 저장 (캐시 좌표 -> 검색 영역 안에서 정확 매칭 -> 오타 허용 매칭 순)
     keyword_positions = {}
-    for field, keywords in keyword_map.items():
-        for keyword in keywords:
-            for idx, row in df.iterrows():
-                for col_name in df.columns:
-                    cell_str = str(row[col_name]).lower().strip().replace("：", "").replace(":", "")
-                    if keyword in cell_str:
-                        keyword_positions[field] = (idx, df.columns.get_loc(col_name))
-                        break
-                if field in keyword_positions:
-                    break
-            if field in keyword_positions:
-                break
+    pending = []
+    for field in KEYWORD_MAP:
+        if layout_cache is not None:
+            hit, position = layout_cache.probe(fingerprint, "all_fields", field, verify_position)
+            if hit:
+                keyword_positions[field] = (position[0], position[1])
+                continue
+        pending.append(field)
+
+    if pending:
+        resolver = FieldResolver(df, KEYWORD_MAP, search_regions, normalize_label)
+        matches = resolver.resolve(pending)
+        for field in pending:
+            match = matches.get(field)
+            if match is not None:
+                keyword_positions[field] = match[1]
+            if layout_cache is not None:
+                cached = None if match is None else [int(match[1][0]), match[1][1], match[0]]
+                layout_cache.record(fingerprint, "all_fields", field, cached)
 
     # 2. 위치 기반 오른쪽 값 추출
     for field, (row_idx, col_idx) in keyword_positions.items():
@@ -98,22 +132,25 @@ def extract_all_fields(df):
         **simple_fields
     }
 
-def extract_from_excel(file_path):
+def extract_from_excel(file_path, engine=None, layout_cache=None, search_regions=None):
     """
     엑셀 파일에서 모든 필드를 추출합니다.
+    :param engine: 읽기 엔진 (None이면 파일 형식/크기로 자동 선택, excel_reader.ENGINES 참고)
+    :param layout_cache: 레이아웃 좌표 캐시 (layout_cache.LayoutCache)
+    :param search_regions: 필드별 검색 영역 (None이면 시트 전체, 상단 블록 프리셋은 SEARCH_REGIONS)
     """
     # 파일 존재 여부 확인
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
     
-    # ExcelFile 객체로 읽기
-    xls = pd.ExcelFile(file_path)
+    # 워크북 읽기
+    xls = open_workbook(file_path, engine=engine)
     result = {}
 
     for sheet_name in xls.sheet_names:
         # 모든 셀을 문자열로 처리
         df = xls.parse(sheet_name)
-        extracted_data = extract_all_fields(df)
+        extracted_data = extract_all_fields(df, layout_cache=layout_cache, search_regions=search_regions)
         
         # 데이터가 있는 경우에만 결과에 추가
         if any(extracted_data.values()):
@@ -1,77 +1,91 @@
 import pandas as pd
 import os
 import json
+from excel_reader import open_workbook
+from party_blocks import PartyBlocks
+from search_region import region_bounds, top_block_regions
 
-def extract_single_value(file_path):
+# 상단 50행만 검색하는 프리셋 (opt-in, 기본은 시트 전체)
+SEARCH_REGIONS = top_block_regions(["shipper", "consignee"])
+
+def extract_single_value(file_path, engine=None, layout_cache=None, search_regions=None):
     """
     주어진 엑셀 파일에서 Shipper와 Consignee 정보를 추출합니다.
     :param file_path: 엑셀 파일 경로
+    :param engine: 읽기 엔진 (None이면 자동 선택)
+    :param layout_cache: 레이아웃 좌표 캐시 (layout_cache.LayoutCache)
+    :param search_regions: 헤더별 검색 영역 (None이면 시트 전체, 상단 블록 프리셋은 SEARCH_REGIONS)
     :return: dict 형태로 {'shipper': [...], 'consignee': [...]} 반환
     """
     # 파일 존재 여부 확인
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
     
-    # ExcelFile 객체로 읽기 (시트 이름에 접근하기 위해)
-    xls = pd.ExcelFile(file_path)
+    # 워크북 읽기 (시트 이름에 접근하기 위해)
+    xls = open_workbook(file_path, engine=engine)
     result = {}
 
     for sheet_name in xls.sheet_names:
         # 모든 셀을 문자열로 처리
         df = xls.parse(sheet_name).astype(str) 
-        shipper, consignee = extract_shipper_consignee(df)
+        shipper, consignee = extract_shipper_consignee(df, layout_cache=layout_cache, search_regions=search_regions)
         if shipper or consignee:
             result[sheet_name] = {'shipper': shipper, 'consignee': consignee}
             break # 가장 먼저 찾은 시트에서 멈춤
 
     return result
 
-def extract_shipper_consignee(df):
+def extract_shipper_consignee(df, layout_cache=None, search_regions=None):
     """
     엑셀 데이터에서 Shipper와 Consignee 정보를 추출합니다.
+    layout_cache: LayoutCache를 주면 같은 레이아웃에서 찾았던 헤더 행을 먼저 확인
+    search_regions: 헤더별 검색 영역 (None이면 시트 전체, 상단 블록만 검색하려면 SEARCH_REGIONS)
     """
-    # 1. 텍스트로 찾기
-    def find_index(keywords):
-        for idx, row in df.iterrows():
-            joined = " ".join(row.fillna("").tolist()).lower()
-            for keyword in keywords:
-                if keyword in joined:
-                    return idx
-        return None
+    if search_regions is None:
+        search_regions = {}
+    fingerprint = layout_cache.fingerprint(df) if layout_cache is not None else None
 
-    # 1-1. 우측 + 우측 포함 하단에 데이터가 있는 경우
-    def get_next_lines(start_idx):
-        lines = []
-        
-        # 1. 같은 행에서 키워드 오른쪽 셀들의 정보 추출
-        if start_idx is not None:
-            row_cells = [cell if cell.lower() != "nan" else "" for cell in df.iloc[start_idx].fillna("").tolist()]
-            # 키워드가 있는 셀의 인덱스를 찾기
-            keyword_col_idx = None
-            for col_idx, cell in enumerate(row_cells):
-                if "shipper" in cell.lower() or "consignee" in cell.lower():
-                    keyword_col_idx = col_idx
-                    break
-            
-            # 키워드 오른쪽 셀들의 정보 추출 (최대 3칸까지)
-            if keyword_col_idx is not None:
-                for col_offset in range(1, 4):  # 오른쪽 1~3칸
-                    if keyword_col_idx + col_offset < len(row_cells):
-                        cell_value = row_cells[keyword_col_idx + col_offset].strip()
-                        if cell_value and not any(k in cell_value.lower() for k in ["shipper", "consignee"]):
-                            lines.append(cell_value)
-        
-        for offset in range(1, 5):
-            if start_idx + offset < len(df):
-                # 각 셀의 'nan'을 공백으로 변환
-                row_cells = [cell if cell.lower() != "nan" else "" for cell in df.iloc[start_idx + offset].fillna("").tolist()]
-                line = " ".join(row_cells).strip()
-                # 완전히 빈 줄은 제외
-                if line and not any(k in line.lower() for k in ["shipper", "consignee"]):
-                    lines.append(line)
-                elif not line:
-                    break
-        return lines
+    def row_has_keyword(idx, keywords):
+        if idx not in df.index:
+            return False
+        joined = " ".join(df.loc[idx].fillna("").tolist()).lower()
+        return any(keyword in joined for keyword in keywords)
+
+    # 1. 텍스트로 찾기 (캐시 확인 후 남은 헤더만 검색 영역 안에서 찾음)
+    # 검색 영역 + 헤더 행 아래 4행까지를 한 번에 문자열 배열/키워드 hit 행렬로 만들어 헤더 행 검색과 블록 추출에 같이 사용
+    def find_indexes(header_keywords):
+        found = {}
+        pending = {}
+        for name, keywords in header_keywords.items():
+            if layout_cache is not None:
+                hit, idx = layout_cache.probe(fingerprint, "shipper_consignee", name, lambda idx: row_has_keyword(idx, keywords))
+                if hit:
+                    found[name] = idx
+                    continue
+            pending[name] = region_bounds(search_regions.get(name), *df.shape)
+
+        spans = [bounds[:2] for bounds in pending.values()]
+        spans += [(df.index.get_loc(idx), df.index.get_loc(idx) + 1) for idx in found.values()]
+        if not spans:
+            return found, None
+        keywords = list(dict.fromkeys(party_keywords + [keyword for words in header_keywords.values() for keyword in words]))
+        blocks = PartyBlocks(df, keywords, min(start for start, _ in spans), max(end for _, end in spans) + 4)
+        for name, bounds in pending.items():
+            row_pos = blocks.first_row(header_keywords[name], bounds)
+            if row_pos is not None:
+                found[name] = df.index[row_pos]
+        if layout_cache is not None:
+            for name in pending:
+                idx = found.get(name)
+                layout_cache.record(fingerprint, "shipper_consignee", name, None if idx is None else int(idx))
+        return found, blocks
+
+    # 1-1. 우측 + 우측 포함 하단에 데이터가 있는 경우 (오른쪽 최대 3칸 + 아래 최대 4행)
+    party_keywords = ["shipper", "consignee"]
+
+    def get_next_lines(start_idx, blocks):
+        # 기존 규칙대로 오른쪽 셀의 " nan " 같은 값은 그대로 둠
+        return blocks.block(df.index.get_loc(start_idx), party_keywords, drop_nan=False)
 
     # 1-2. 하단 + 우측에 데이터가 있는 경우
     def get_bottom_lines(start_idx):
@@ -87,11 +101,12 @@ def extract_shipper_consignee(df):
     consignee_header_keywords = ["consignee"]
 
     # 헤더 찾기
-    shipper_idx = find_index(shipper_header_keywords)
-    consignee_idx = find_index(consignee_header_keywords)
+    header_indexes, blocks = find_indexes({"shipper": shipper_header_keywords, "consignee": consignee_header_keywords})
+    shipper_idx = header_indexes.get("shipper")
+    consignee_idx = header_indexes.get("consignee")
 
-    shipper_info = get_next_lines(shipper_idx) if shipper_idx is not None else []
-    consignee_info = get_next_lines(consignee_idx) if consignee_idx is not None else []
+    shipper_info = get_next_lines(shipper_idx, blocks) if shipper_idx is not None else []
+    consignee_info = get_next_lines(consignee_idx, blocks) if consignee_idx is not None else []
 
     return shipper_info, consignee_info
 
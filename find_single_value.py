@@ -1,15 +1,39 @@
 import pandas as pd
 import os
 import json
+from excel_reader import open_workbook
+from fuzzy_match import bounded_distance, build_cell_index, resolve_max_dist
+from search_region import TOP_BLOCK_REGION, in_bounds, region_bounds
 
-def find_all_header_locations(df, keywords):
-    found = []
-    for idx, row in df.iterrows():
-        for col_idx, cell in enumerate(row):
-            cell_str = str(cell).lower()
-            for keyword in keywords:
-                if keyword in cell_str:
-                    found.append((keyword, idx, col_idx))
+def find_all_header_locations(df, keywords, max_dist=None, index=None, region=None):
+    """
+    keywords가 포함된 모든 셀 위치를 (keyword, row_idx, col_idx) 목록으로 반환합니다.
+    정확 매칭이 하나라도 있으면 정확 매칭만, 없을 때만 퍼지 매칭 결과를 반환합니다. (NgramIndex.find_first와 같은 규칙)
+    max_dist: 키워드별 허용 편집 거리 (None이면 키워드 길이에 따른 기본값)
+    index: build_cell_index로 미리 만든 셀 색인 (여러 target에서 재사용, region을 포함해야 함)
+    region: 검색 영역 {"rows": ..., "cols": ...} (search_region.region_range 형식, None이면 시트 전체)
+    """
+    bounds = region_bounds(region, *df.shape)
+    if index is None:
+        index = build_cell_index(df, row_range=bounds[:2], col_range=bounds[2:])
+
+    def search(limit_of):
+        found = []
+        for keyword_order, keyword in enumerate(keywords):
+            limit = limit_of(keyword)
+            if limit is None:
+                continue
+            for pos, (idx, col_idx), _ in index.search(keyword, limit):
+                if in_bounds(bounds, df.index.get_loc(idx), col_idx):
+                    found.append((pos, keyword_order, keyword, idx, col_idx))
+        # 기존 스캔 순서(행 -> 열 -> 키워드)와 동일하게 정렬
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [(keyword, idx, col_idx) for _, _, keyword, idx, col_idx in found]
+
+    found = search(lambda keyword: 0)
+    if not found:
+        # 오타 허용이 없는 키워드(max_dist 0)는 정확 매칭에서 이미 확인했으므로 건너뜀
+        found = search(lambda keyword: resolve_max_dist(keyword, max_dist) or None)
     return found
 
 """
@@ -71,105 +95,147 @@ def extract_row_right_of_header_single_row(df, header_row_idx, header_col_idx, o
                 values.append(cell_value)
     return values
 
-def extract_multi_targets(file_path, targets):
+def verify_locations(df, locations, max_dist=None):
+    # 캐시된 (keyword, row_idx, col_idx) 셀마다 키워드가 여전히 있는지 확인 (extract_all_fields.verify_position과 같은 규칙)
+    for keyword, row_idx, col_idx in locations:
+        if row_idx >= len(df) or col_idx >= df.shape[1]:
+            return False
+        cell_str = str(df.iat[row_idx, col_idx]).lower()
+        if bounded_distance(keyword, cell_str, resolve_max_dist(keyword, max_dist)) is None:
+            return False
+    return True
+
+def extract_targets(df, targets, layout_cache=None):
+    """
+    문자열로 변환된 시트(df)에서 targets 설정별 값을 추출합니다.
+    target 설정의 rows/cols로 키워드 검색 영역을 제한할 수 있습니다. (search_region.region_range 형식)
+    layout_cache: LayoutCache를 주면 같은 레이아웃에서 찾았던 헤더 좌표를 먼저 확인 (캐시 좌표의 셀만 다시 확인)
+    """
+    info = {}
+    index = None
+    # 모든 target 검색 영역을 합친 범위만 한 번 색인
+    all_bounds = [region_bounds(conf, *df.shape) for conf in targets.values()]
+    index_rows = (min(b[0] for b in all_bounds), max(b[1] for b in all_bounds)) if all_bounds else None
+    index_cols = (min(b[2] for b in all_bounds), max(b[3] for b in all_bounds)) if all_bounds else None
+    fingerprint = layout_cache.fingerprint(df) if layout_cache is not None else None
+    for key, conf in targets.items():
+        found_locs = None
+        if layout_cache is not None:
+            hit, cached = layout_cache.probe(fingerprint, "multi_targets", key,
+                                             lambda locs: verify_locations(df, locs, conf.get("max_dist")))
+            if hit:
+                found_locs = [tuple(loc) for loc in cached]
+        if found_locs is None:
+            if index is None:
+                index = build_cell_index(df, row_range=index_rows, col_range=index_cols)
+            found_locs = find_all_header_locations(df, conf['keywords'], max_dist=conf.get("max_dist"), index=index, region=conf)
+            if layout_cache is not None:
+                layout_cache.record(fingerprint, "multi_targets", key, [[k, int(r), c] for k, r, c in found_locs])
+        all_values = []
+        for _, row_idx, col_idx in found_locs:
+            mode = conf.get("mode", "column")
+            offset = conf.get("offset", 0)
+            x = conf.get("x", 1)
+            y = conf.get("y", None)
+            if mode == "column":
+                values = extract_box_column(df, row_idx, col_idx, offset=offset, x=x, y=y)
+            elif mode == "row":
+                values = extract_row_right_of_header(df, row_idx, col_idx, offset=offset, x=x, y=y)
+            elif mode == "row_single":
+                values = extract_row_right_of_header_single_row(df, row_idx, col_idx, offset=offset, x=x, y=y)
+            else:
+                values = []
+            for v in values:
+                if v not in all_values:
+                    all_values.append(v)
+        info[key] = all_values
+    return info
+
+def extract_multi_targets(file_path, targets, engine=None, layout_cache=None):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
-    xls = pd.ExcelFile(file_path)
+    xls = open_workbook(file_path, engine=engine)
     result = {}
     for sheet_name in xls.sheet_names:
         df = xls.parse(sheet_name).astype(str)
-        info = {}
-        for key, conf in targets.items():
-            found_locs = find_all_header_locations(df, conf['keywords'])
-            all_values = []
-            for _, row_idx, col_idx in found_locs:
-                mode = conf.get("mode", "column")
-                offset = conf.get("offset", 0)
-                x = conf.get("x", 1)
-                y = conf.get("y", None)
-                if mode == "column":
-                    values = extract_box_column(df, row_idx, col_idx, offset=offset, x=x, y=y)
-                elif mode == "row":
-                    values = extract_row_right_of_header(df, row_idx, col_idx, offset=offset, x=x, y=y)
-                elif mode == "row_single":
-                    values = extract_row_right_of_header_single_row(df, row_idx, col_idx, offset=offset, x=x, y=y)
-                else:
-                    values = []
-                for v in values:
-                    if v not in all_values:
-                        all_values.append(v)
-            info[key] = all_values
-        result[sheet_name] = info
+        result[sheet_name] = extract_targets(df, targets, layout_cache=layout_cache)
         break
     return result
 
+TARGETS = {
+    "row_mode": {
+        "keywords": ["row mode"],
+        "mode": "row",
+        "offset": 1,
+        "x": 1,
+        "y": 4
+    },
+    "row_mode_single": {
+        "keywords": ["row_single mode"],
+        "mode": "row_single",
+        "offset": 1,
+        "x": 1,
+        "y": 2
+    },
+    "column_mode": {
+        "keywords": ["column mode"],
+        "mode": "column",
+        "offset": 1,
+        "x": 1,
+        "y": 4
+    },
+    "column_single_mode": {
+        "keywords": ["column_single mode"],
+        "mode": "column_single"
+    },
+    "shipper": {
+        "keywords": ["shipper", "shipper/exporter", "exporter"],
+        "mode": "column",
+        "offset": 0,
+        "x": 1,
+        "y": 5
+    },
+    "consignee": {
+        "keywords": ["consignee", "consignee/importer", "consigee"],
+        "mode": "column",
+        "offset": 0,
+        "x": 1,
+        "y": 4
+    },
+    "depatrure": {
+        "keywords": ["depatrure"],
+        "mode": "row_single",
+        "offset": 1,     # CODE NO.가 notify 오른쪽 첫 칸이면 1
+        "x": 3,          # 3칸만 긁고 싶으면 3, 끝까지는 None
+        "y": 1
+    },
+    "invoice_no": {
+        "keywords": ["invoice no", "inv.no"],
+        "mode": "row_single",
+        "offset": 1,
+        "x": 3,
+        "y": 1
+    },
+    "notify_all": {
+        "keywords": ["notify", "notify party"],
+        "mode": "column"
+    },
+    "destination": {
+        "keywords": ["destination"],
+        "mode": "column"
+    }
+}
+
+# 헤더 라벨을 상단 50행에서만 찾는 프리셋 (opt-in, 기본 TARGETS는 시트 전체 검색)
+TOP_BLOCK_TARGETS = {
+    key: dict(conf, **TOP_BLOCK_REGION) if key in ("shipper", "consignee", "depatrure", "invoice_no", "notify_all", "destination") else conf
+    for key, conf in TARGETS.items()
+}
+
 if __name__ == "__main__":
     # file_path = "/Users/zionchoi/Desktop/test_pdf/example_excel.xlsx"
     file_path = "/Users/zionchoi/Desktop/test_pdf/SK-10665（6226）.xlsx"
 
-    targets = {
-        "row_mode": {
-            "keywords": ["row mode"],
-            "mode": "row",
-            "offset": 1,
-            "x": 1,
-            "y": 4
-        },
-        "row_mode_single": {
-            "keywords": ["row_single mode"],
-            "mode": "row_single",
-            "offset": 1,
-            "x": 1,
-            "y": 2
-        },
-        "column_mode": {
-            "keywords": ["column mode"],
-            "mode": "column",
-            "offset": 1,
-            "x": 1,
-            "y": 4
-        },
-        "column_single_mode": {
-            "keywords": ["column_single mode"],
-            "mode": "column_single"
-        },
-        "shipper": {
-            "keywords": ["shipper", "shipper/exporter", "exporter"],
-            "mode": "column",
-            "offset": 0,
-            "x": 1,
-            "y": 5
-        },
-        "consignee": {
-            "keywords": ["consignee", "consignee/importer", "consigee"],
-            "mode": "column",
-            "offset": 0,
-            "x": 1,
-            "y": 4
-        },
-        "depatrure": {
-            "keywords": ["depatrure"],
-            "mode": "row_single",
-            "offset": 1,     # CODE NO.가 notify 오른쪽 첫 칸이면 1
-            "x": 3,          # 3칸만 긁고 싶으면 3, 끝까지는 None
-            "y": 1
-        },
-        "invoice_no": {
-            "keywords": ["invoice no", "inv.no"],
-            "mode": "row_single",
-            "offset": 1,
-            "x": 3,
-            "y": 1
-        },
-        "notify_all": {
-            "keywords": ["notify", "notify party"],
-            "mode": "column"
-        },
-        "destination": {
-            "keywords": ["destination"],
-            "mode": "column"
-        }
-    }
-    result = extract_multi_targets(file_path, targets)
+    result = extract_multi_targets(file_path, TARGETS)
     info = next(iter(result.values()))
     print(json.dumps(info, ensure_ascii=False, indent=2))
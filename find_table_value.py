@@ -2,6 +2,7 @@ from pickle import NONE
 import pandas as pd
 import os
 import json
+from excel_reader import open_workbook
 
 # 1. 특정 키워드가 정확하게 포함된 셀의 위치를 찾는 함수
 def find_case_no_header(df, keyword="Case No."):
@@ -77,41 +78,51 @@ def group_data_rows_by_ranges(rows, group_size, header_ranges):
     print(f"[STEP 5 결과] groups(그룹 개수)={len(groups)}")
     return groups
 
+# 시트 단위 처리 : 키워드 헤더를 찾아 구조화된 데이터 추출 (키워드가 없으면 None)
+def extract_table_from_df(df, keyword, header_above=0, header_below=0, height=None, group_size=2, header_ranges=None):
+    header_row_idx, header_col_idx = find_case_no_header(df, keyword)
+    if header_row_idx is None:
+        return None
+
+    if header_ranges is not None:
+        # 사용자가 직접 header_ranges를 지정한 경우 (시트 기준 열 번호이므로 앞쪽 빈 열을 잘라낸 만큼 보정)
+        # 잘라낸 빈 열에 걸친 범위는 0부터 시작 (음수 인덱스로 뒤쪽 열을 읽지 않도록)
+        col_offset = df.attrs.get("col_offset", 0)
+        header_ranges = [(h, max(start - col_offset, 0), max(end - col_offset, 0)) for h, start, end in header_ranges]
+        header_names = [h for h, _, _ in header_ranges]
+    else:
+        # 자동 계산
+        headers_with_indices = extract_multiline_header_with_indices(df, header_row_idx, header_col_idx, header_above, header_below)
+        header_names = [h for h, _ in headers_with_indices]
+        header_ranges = get_header_ranges(headers_with_indices, df.shape[1])
+
+    # 데이터 추출
+    data_start_row = header_row_idx + header_below + 1
+    table = extract_table_rows(df, data_start_row, header_col_idx, len(header_names), height)
+    grouped_rows = group_data_rows_by_ranges(table, group_size, header_ranges)
+
+    # 헤더-데이터 매핑 (빈 값은 제외)
+    result = []
+    for row in grouped_rows:
+        row_dict = {h: v for h, v in zip(header_names, row) if v}
+        if row_dict.get(header_names[0], '').strip():
+            result.append(row_dict)
+    return result
+
 # 메인 함수 : 전체 프로세스를 통합하여 Excel 파일에서 구조화된 데이터 추출
-def extract_table_with_dynamic_header(file_path, keyword, header_above=0, header_below=0, height=None, group_size=2, header_ranges=None):
+def extract_table_with_dynamic_header(file_path, keyword, header_above=0, header_below=0, height=None, group_size=2, header_ranges=None, engine=None):
     print("[MAIN] extract_table_with_dynamic_header 시작")
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
     
-    xls = pd.ExcelFile(file_path)
+    xls = open_workbook(file_path, engine=engine)
     for sheet_name in xls.sheet_names:
         print(f"[MAIN] 시트 처리: {sheet_name}")
         df = xls.parse(sheet_name).astype(str).fillna('')
-        header_row_idx, header_col_idx = find_case_no_header(df, keyword)
-        if header_row_idx is None:
+        result = extract_table_from_df(df, keyword, header_above, header_below, height, group_size, header_ranges)
+        if result is None:
             print(f"[MAIN] 키워드 '{keyword}' 미발견, 다음 시트로")
             continue
-
-        if header_ranges is not None:
-            # 사용자가 직접 header_ranges를 지정한 경우
-            header_names = [h for h, _, _ in header_ranges]
-        else:
-            # 자동 계산
-            headers_with_indices = extract_multiline_header_with_indices(df, header_row_idx, header_col_idx, header_above, header_below)
-            header_names = [h for h, _ in headers_with_indices]
-            header_ranges = get_header_ranges(headers_with_indices, df.shape[1])
-
-        # 데이터 추출
-        data_start_row = header_row_idx + header_below + 1
-        table = extract_table_rows(df, data_start_row, header_col_idx, len(header_names), height)
-        grouped_rows = group_data_rows_by_ranges(table, group_size, header_ranges)
-
-        # 헤더-데이터 매핑 (빈 값은 제외)
-        result = []
-        for row in grouped_rows:
-            row_dict = {h: v for h, v in zip(header_names, row) if v}
-            if row_dict.get(header_names[0], '').strip():
-                result.append(row_dict)
         print(f"[MAIN] 최종 result(행 개수)={len(result)}")
         return result
 
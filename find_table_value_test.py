@@ -2,13 +2,29 @@ import pandas as pd
 import json
 import re
 from collections import defaultdict
+from excel_reader import open_workbook
+from fuzzy_match import NgramIndex, resolve_max_dist
 
 def normalize_col(col):
     # 소문자, 공백/특수문자 제거
     return re.sub(r'[^a-zA-Z0-9가-힣]', '', str(col)).lower()
 
-def find_best_column(columns, candidates):
+def build_column_index(columns):
+    # find_best_column 오타 허용 매치용 상위/하위 헤더 n-gram 색인
+    upper_index = NgramIndex()
+    lower_index = NgramIndex()
+    for pos, col in enumerate(columns):
+        if isinstance(col, tuple):
+            upper_index.add(pos, normalize_col(col[0]) if col[0] else "")
+            lower_index.add(pos, normalize_col(col[1]) if col[1] else "")
+        else:
+            upper_index.add(pos, normalize_col(col))
+            lower_index.add(pos, "")
+    return upper_index, lower_index
+
+def find_best_column(columns, candidates, index=None):
     # candidates: 튜플 후보들의 리스트
+    # index: build_column_index 결과 (같은 columns로 여러 번 호출할 때 재사용)
     for candidate in candidates:
         if candidate in columns:
             return candidate
@@ -31,6 +47,22 @@ def find_best_column(columns, candidates):
                 col_norm = normalize_col(col)
                 if candidate_upper and candidate_upper in col_norm:
                     return col
+
+    # 부분 매치도 없으면 오타 허용 매치 시도 (상위 헤더가 비어있는 후보는 하위 헤더로 매치)
+    upper_index, lower_index = index if index is not None else build_column_index(columns)
+    for candidate in candidates:
+        candidate_upper = normalize_col(candidate[0]) if candidate[0] else ""
+        candidate_lower = normalize_col(candidate[1]) if candidate[1] else ""
+        if candidate_upper:
+            hits = {pos for pos, _, _ in upper_index.search(candidate_upper, resolve_max_dist(candidate_upper))}
+        elif candidate_lower:
+            hits = {pos for pos, text in enumerate(upper_index.texts) if not text}
+        else:
+            continue
+        if candidate_lower:
+            hits &= {pos for pos, _, _ in lower_index.search(candidate_lower, resolve_max_dist(candidate_lower))}
+        if hits:
+            return columns[min(hits)]
     return None
 
 def safe_get(row, col):
@@ -112,9 +144,7 @@ def find_table_value(df):
         "description.qty": [("", "Q'ty")],
         "description.price": [("", "Price(￥)")],
         "description.amount": [("", "Amount(￥)")],
-        "description.material_no": [
-            ("", "material NO."), ("", "Material NO."), ("", "MaterialNo"), ("", "MATERIAL NO")
-        ],
+        "description.material_no": [("", "material NO.")],
         "n_w.kgs": [("N/W", "(kgs)")],
         "g_w.kgs": [("G/W", "(kgs)")],
         "dimension.l": [("Dimension(ｃｍ）", "Ｌ")],
@@ -125,12 +155,14 @@ def find_table_value(df):
 
     columns = list(df_data.columns)
     print("실제 columns:", columns)
-    case_no_col = find_best_column(columns, key_map["case_no"])
+    # 컬럼 매칭은 행마다 반복하지 않고 한 번만 수행
+    column_index = build_column_index(columns)
+    matched_cols = {key: find_best_column(columns, candidates, column_index) for key, candidates in key_map.items()}
+    case_no_col = matched_cols["case_no"]
     if case_no_col is None:
         return []
 
     # 병합 셀로 인한 빈 값 채우기 (case_no)
-    case_no_col = find_best_column(list(df_data.columns), key_map["case_no"])
     if case_no_col is not None:
         df_data[case_no_col] = df_data[case_no_col].replace("", pd.NA).fillna(method="ffill")
 
@@ -155,7 +187,7 @@ def find_table_value(df):
     for _, row in valid_rows.iterrows():
         item = {}
         item["case_no"] = safe_get(row, case_no_col)
-        col_package_style = find_best_column(columns, key_map["package.style"])
+        col_package_style = matched_cols["package.style"]
         item["package"] = {"style": safe_get(row, col_package_style)}
 
         desc = {}
@@ -163,11 +195,11 @@ def find_table_value(df):
             "contract_no", "por_no", "eng_model", "company_serial", "drw_no", "parts_name", "qty", "price", "amount", "material_no"
         ]:
             map_key = f"description.{subkey}"
-            col = find_best_column(columns, key_map[map_key])
+            col = matched_cols[map_key]
             desc[subkey] = safe_get(row, col)
         item["description"] = desc
 
-        col_nw = find_best_column(columns, key_map["n_w.kgs"])
+        col_nw = matched_cols["n_w.kgs"]
         nw_val = safe_get(row, col_nw)
         try:
             nw_val_fmt = f"{float(nw_val):.2f}" if nw_val and nw_val.replace('.','',1).isdigit() else nw_val
@@ -175,7 +207,7 @@ def find_table_value(df):
             nw_val_fmt = nw_val
         item["n_w"] = {"kgs": nw_val_fmt}
 
-        col_gw = find_best_column(columns, key_map["g_w.kgs"])
+        col_gw = matched_cols["g_w.kgs"]
         gw_val = safe_get(row, col_gw)
         try:
             gw_val_fmt = f"{float(gw_val):.2f}" if gw_val and gw_val.replace('.','',1).isdigit() else gw_val
@@ -183,16 +215,16 @@ def find_table_value(df):
             gw_val_fmt = gw_val
         item["g_w"] = {"kgs": gw_val_fmt}
 
-        col_l = find_best_column(columns, key_map["dimension.l"])
-        col_w = find_best_column(columns, key_map["dimension.w"])
-        col_h = find_best_column(columns, key_map["dimension.h"])
+        col_l = matched_cols["dimension.l"]
+        col_w = matched_cols["dimension.w"]
+        col_h = matched_cols["dimension.h"]
         item["dimension"] = {
             "l": safe_get(row, col_l),
             "w": safe_get(row, col_w),
             "h": safe_get(row, col_h),
         }
 
-        col_m3 = find_best_column(columns, key_map["mment.m3"])
+        col_m3 = matched_cols["mment.m3"]
         m3_val = safe_get(row, col_m3)
         try:
             m3_val_fmt = f"{float(m3_val):.3f}" if m3_val and m3_val.replace('.','',1).isdigit() else m3_val
@@ -262,7 +294,7 @@ if __name__ == "__main__":
     file_path = "/Users/zionchoi/Desktop/test_pdf/HHIENG25-036_20250612.xlsx"
     try:
         # 엑셀 파일을 DataFrame으로 읽기
-        xls = pd.ExcelFile(file_path)
+        xls = open_workbook(file_path)
         for sheet_name in xls.sheet_names:
             df = xls.parse(sheet_name, header=None)
             result = find_table_value(df)
@@ -0,0 +1,147 @@
+"""
+오타가 있는 라벨(예: consigee, depatrure)을 변형 목록 없이 찾기 위한 퍼지 매칭 엔진
+- 1단계: 문자 n-gram 역색인으로 후보 셀을 좁힘
+- 2단계: 후보만 bounded 편집 거리(인접 문자 전치 포함)로 검증
+"""
+from collections import defaultdict
+
+def default_max_dist(keyword):
+    # 공백이 있는 짧은 구(invoice no 등)나 짧은 단어는 오탐이 많으므로 정확 매칭만 허용
+    length = len(keyword)
+    if " " in keyword or length < 6:
+        return 0
+    if length < 12:
+        return 1
+    return 2
+
+def resolve_max_dist(keyword, max_dist=None):
+    """
+    키워드별 허용 편집 거리를 결정합니다.
+    :param max_dist: None(기본 규칙), int(모든 키워드 공통), dict(키워드별 지정, 없으면 기본 규칙)
+    """
+    if isinstance(max_dist, dict):
+        return max_dist.get(keyword, default_max_dist(keyword))
+    if max_dist is None:
+        return default_max_dist(keyword)
+    return max_dist
+
+def bounded_distance(pattern, text, max_dist):
+    """
+    text 안의 임의 부분 문자열과 pattern 사이의 최소 편집 거리를 반환합니다.
+    (삽입/삭제/치환/인접 전치 각 1) max_dist를 넘으면 None
+    """
+    m = len(pattern)
+    if pattern in text:
+        return 0
+    if max_dist <= 0 or len(text) < m - max_dist:
+        return None
+
+    limit = max_dist + 1
+    prev2 = None
+    prev = [min(i, limit) for i in range(m + 1)]
+    best = prev[m]
+    for j, ch in enumerate(text, start=1):
+        # 부분 문자열 매칭이므로 text 어느 위치에서든 시작 가능 (D[0][j] = 0)
+        cur = [0] * (m + 1)
+        for i in range(1, m + 1):
+            cost = 0 if pattern[i - 1] == ch else 1
+            v = min(prev[i] + 1, cur[i - 1] + 1, prev[i - 1] + cost)
+            if prev2 is not None and i > 1 and pattern[i - 1] == text[j - 2] and pattern[i - 2] == ch:
+                v = min(v, prev2[i - 2] + 1)
+            cur[i] = min(v, limit)
+        if cur[m] < best:
+            best = cur[m]
+        prev2, prev = prev, cur
+    return best if best <= max_dist else None
+
+def ngrams(text, n):
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+class NgramIndex:
+    """
+    문자 n-gram 역색인
+    add 순서(행 우선 스캔 순서)를 그대로 유지하므로 검색 결과도 기존 스캔 순서와 같습니다.
+    """
+    def __init__(self, n=3):
+        self.n = n
+        self.keys = []
+        self.texts = []
+        self.postings = defaultdict(set)
+
+    def add(self, key, text):
+        pos = len(self.texts)
+        self.keys.append(key)
+        self.texts.append(text)
+        for gram in set(ngrams(text, self.n)):
+            self.postings[gram].add(pos)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def candidates(self, keyword, max_dist):
+        # q-gram 보조정리: 편집 1회는 최대 n+1개(전치 포함)의 n-gram 위치를 깨뜨림
+        grams = ngrams(keyword, self.n)
+        distinct = set(grams)
+        required = len(grams) - max_dist * (self.n + 1) - (len(grams) - len(distinct))
+        if required <= 0:
+            return range(len(self.texts))
+
+        counts = defaultdict(int)
+        for gram in distinct:
+            for pos in self.postings.get(gram, ()):
+                counts[pos] += 1
+        return sorted(pos for pos, count in counts.items() if count >= required)
+
+    def search(self, keyword, max_dist=0):
+        """
+        keyword가 편집 거리 max_dist 이내로 포함된 항목을 찾습니다.
+        :return: [(pos, key, dist), ...] (추가 순서)
+        """
+        found = []
+        for pos in self.candidates(keyword, max_dist):
+            text = self.texts[pos]
+            if max_dist == 0:
+                if keyword in text:
+                    found.append((pos, self.keys[pos], 0))
+                continue
+            dist = bounded_distance(keyword, text, max_dist)
+            if dist is not None:
+                found.append((pos, self.keys[pos], dist))
+        return found
+
+    def find_first(self, keywords, max_dist=None):
+        """
+        키워드 우선순위대로 정확 매칭을 먼저 찾고, 없으면 퍼지 매칭으로 다시 찾습니다.
+        :return: (keyword, key, dist) 또는 None
+        """
+        for keyword in keywords:
+            found = self.search(keyword, 0)
+            if found:
+                _, key, dist = found[0]
+                return keyword, key, dist
+        for keyword in keywords:
+            limit = resolve_max_dist(keyword, max_dist)
+            if limit <= 0:
+                continue
+            found = self.search(keyword, limit)
+            if found:
+                _, key, dist = found[0]
+                return keyword, key, dist
+        return None
+
+def build_cell_index(df, normalize=None, n=3, row_range=None, col_range=None):
+    """
+    DataFrame의 셀을 행 우선 순서로 색인합니다.
+    key는 (행 라벨, 열 위치) 이며 iterrows + enumerate 와 동일합니다.
+    row_range / col_range: 색인할 (start, end) 위치 범위 (None이면 전체)
+    """
+    if normalize is None:
+        normalize = lambda v: str(v).lower()
+    row_start, row_end = row_range or (0, df.shape[0])
+    col_start, col_end = col_range or (0, df.shape[1])
+    index = NgramIndex(n)
+    columns = [df.iloc[row_start:row_end, col_idx].tolist() for col_idx in range(col_start, col_end)]
+    for offset, row_label in enumerate(df.index[row_start:row_end]):
+        for col_offset, values in enumerate(columns):
+            index.add((row_label, col_start + col_offset), normalize(values[offset]))
+    return index
@@ -0,0 +1,118 @@
+"""
+거래처별 고정 레이아웃 캐시
+- 상단 행의 라벨 셀(숫자가 없는 짧은 텍스트)로 레이아웃 지문(fingerprint)을 만들고
+- 지문별로 각 필드를 찾았던 셀 좌표를 기억해 두었다가 다음 파일에서 그 좌표부터 확인(probe)
+- probe 검증에 실패하면 호출 측에서 전체 스캔으로 대체
+- 못 찾은 필드는 저장하지 않음 (같은 레이아웃의 다음 파일에는 값이 있을 수 있으므로 항상 전체 스캔)
+
+사용 예:
+    cache = LayoutCache("layout_cache.json")
+    for path in files:
+        extract_from_excel(path, layout_cache=cache)
+    cache.save()
+"""
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+DIGIT_RE = re.compile(r"\d")
+
+class LayoutCache:
+    """
+    :param path: JSON 저장 경로 (None이면 메모리에만 유지)
+    :param top_rows: 지문 계산에 사용할 상단 행 수
+    :param max_layouts: 보관할 최대 레이아웃 수 (오래 안 쓴 것부터 제거)
+    """
+    def __init__(self, path=None, top_rows=15, max_layouts=1000):
+        self.path = path
+        self.top_rows = top_rows
+        self.max_layouts = max_layouts
+        self.layouts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # record()로 바뀐 (지문, namespace) - 다른 프로세스의 캐시에 합칠 때 사용
+        self.touched = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.layouts = OrderedDict(json.load(f).get("layouts", {}))
+
+    def fingerprint(self, df):
+        """
+        상단 top_rows 행의 라벨 셀 (행, 열, 텍스트)로 지문을 계산합니다.
+        값 셀(번호/날짜/수량 등 숫자 포함)은 파일마다 달라지므로 제외합니다.
+        """
+        labels = []
+        head = df.iloc[:self.top_rows]
+        for col_idx in range(head.shape[1]):
+            for row_pos, value in enumerate(head.iloc[:, col_idx].tolist()):
+                text = str(value).strip().lower()
+                if not text or text == "nan" or len(text) > 40 or DIGIT_RE.search(text):
+                    continue
+                labels.append(f"{row_pos},{col_idx},{text}")
+        # 헤더(컬럼명)도 첫 행 라벨이므로 포함
+        labels.extend(f"h,{col_idx},{str(col).strip().lower()}" for col_idx, col in enumerate(df.columns)
+                      if not DIGIT_RE.search(str(col)))
+        labels.sort()
+        return hashlib.sha1("\n".join(labels).encode("utf-8")).hexdigest()[:16]
+
+    def probe(self, fingerprint, namespace, field, verify):
+        """
+        캐시된 좌표를 verify(position)로 검증해 통과하면 반환합니다.
+        :return: (hit, position) - 캐시에 없거나 검증 실패 시 (False, None)
+        """
+        position = self.layouts.get(fingerprint, {}).get(namespace, {}).get(field)
+        # 이전 버전 캐시 파일에 남아 있는 "못 찾음"(None / 빈 목록)도 캐시에 없는 것으로 봄
+        if position is None or position == []:
+            self.misses += 1
+            return False, None
+        if verify(position):
+            self.hits += 1
+            self.layouts.move_to_end(fingerprint)
+            return True, position
+        self.misses += 1
+        return False, None
+
+    def record(self, fingerprint, namespace, field, position):
+        """
+        field를 찾은 좌표를 저장합니다.
+        못 찾은 경우(None / 빈 목록)는 저장하지 않고, 이전에 저장된 좌표가 있으면 지웁니다.
+        """
+        self.touched.add((fingerprint, namespace))
+        if position is None or position == []:
+            self.layouts.get(fingerprint, {}).get(namespace, {}).pop(field, None)
+            return
+        layout = self.layouts.setdefault(fingerprint, {})
+        layout.setdefault(namespace, {})[field] = position
+        self.layouts.move_to_end(fingerprint)
+        while len(self.layouts) > self.max_layouts:
+            self.layouts.popitem(last=False)
+
+    def changes(self):
+        """
+        record()로 바뀐 항목을 {지문: {namespace: {field: 좌표}}}로 반환합니다. (워커 프로세스 -> merge)
+        """
+        changed = {}
+        for fingerprint, namespace in self.touched:
+            fields = self.layouts.get(fingerprint, {}).get(namespace, {})
+            changed.setdefault(fingerprint, {})[namespace] = dict(fields)
+        return changed
+
+    def merge(self, changed):
+        """
+        다른 프로세스의 changes() 결과를 합칩니다. (namespace 단위로 덮어씀)
+        """
+        for fingerprint, namespaces in changed.items():
+            layout = self.layouts.setdefault(fingerprint, {})
+            layout.update(namespaces)
+            self.layouts.move_to_end(fingerprint)
+        while len(self.layouts) > self.max_layouts:
+            self.layouts.popitem(last=False)
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"layouts": self.layouts}, f, ensure_ascii=False)
@@ -0,0 +1,167 @@
+"""
+OCR 업로드 이미지 준비 방식 비교
+- 기존 방식(200 DPI 컬러 JPEG)과 prepare_page(gray / binary)의 업로드 크기, 준비 시간, 예상 업로드 시간 비교
+- pytesseract가 설치되어 있으면 로컬 OCR로 인식 결과 일치율(기존 이미지 단어 대비)과 OCR 시간도 측정
+  (원격 OCR 대신 쓰는 대체 측정이며, 원격 API 호출은 하지 않음)
+
+사용 예:
+    python benchmark_image_prep.py samples/ --mbps 10 --json image_prep.json
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+from PIL import Image
+
+from image_prep import BASELINE_DPI, MAX_BYTES, prepare_page
+from pdf_router import classify_pages, open_pdf, render_page
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+MODES = ["gray", "binary"]
+
+def collect_pdfs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(".pdf"))
+        else:
+            files.append(path)
+    return files
+
+def baseline_image(page):
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    render_page(page, dpi=BASELINE_DPI).convert("RGB").save(buffer, "JPEG")
+    return buffer.getvalue(), time.perf_counter() - start
+
+def local_ocr_words(data):
+    """
+    :return: (단어 Counter, OCR 초) - pytesseract가 없으면 (None, None)
+    """
+    if pytesseract is None:
+        return None, None
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(Image.open(io.BytesIO(data)))
+    return Counter(text.split()), time.perf_counter() - start
+
+def word_parity(reference, words):
+    # 기존 이미지에서 읽은 단어 중 같은 단어를 몇 %나 다시 읽었는지
+    if reference is None or words is None:
+        return None
+    total = sum(reference.values())
+    if total == 0:
+        return 1.0
+    return sum((reference & words).values()) / total
+
+def upload_seconds(size, mbps):
+    return size * 8 / (mbps * 1_000_000)
+
+def benchmark_page(page, mbps, max_bytes):
+    """
+    :return: {"baseline": {...}, "gray": {...}, "binary": {...}}
+    """
+    data, seconds = baseline_image(page)
+    reference, ocr_seconds = local_ocr_words(data)
+    result = {"baseline": {
+        "dpi": BASELINE_DPI,
+        "bytes": len(data),
+        "prep_seconds": seconds,
+        "upload_seconds": upload_seconds(len(data), mbps),
+        "ocr_seconds": ocr_seconds,
+        "parity": 1.0 if reference is not None else None,
+    }}
+    for mode in MODES:
+        start = time.perf_counter()
+        prepared = prepare_page(page, mode=mode, max_bytes=max_bytes)
+        seconds = time.perf_counter() - start
+        words, ocr_seconds = local_ocr_words(prepared["data"])
+        result[mode] = {
+            "dpi": prepared["dpi"],
+            "bytes": prepared["bytes"],
+            "over_limit": prepared["over_limit"],
+            "prep_seconds": seconds,
+            "upload_seconds": upload_seconds(prepared["bytes"], mbps),
+            "ocr_seconds": ocr_seconds,
+            "parity": word_parity(reference, words),
+        }
+    for stat in result.values():
+        # 예상 end-to-end = 준비 + 업로드 (+ 로컬 OCR이 있으면 인식 시간)
+        stat["end_to_end_seconds"] = stat["prep_seconds"] + stat["upload_seconds"] + (stat["ocr_seconds"] or 0)
+    return result
+
+def summarize(report):
+    """
+    방식별 합계/중앙값: {mode: {"bytes", "saved_bytes", "over_limit_pages", "median_end_to_end", "median_parity"}}
+    """
+    summary = {}
+    pages = [page for pages in report.values() for page in pages]
+    if not pages:
+        return summary
+    baseline_bytes = sum(page["baseline"]["bytes"] for page in pages)
+    for mode in ["baseline"] + MODES:
+        stats = [page[mode] for page in pages]
+        parities = [stat["parity"] for stat in stats if stat["parity"] is not None]
+        total_bytes = sum(stat["bytes"] for stat in stats)
+        summary[mode] = {
+            "bytes": total_bytes,
+            "saved_bytes": baseline_bytes - total_bytes,
+            "over_limit_pages": sum(1 for stat in stats if stat.get("over_limit")),
+            "median_end_to_end": statistics.median(stat["end_to_end_seconds"] for stat in stats),
+            "median_parity": statistics.median(parities) if parities else None,
+        }
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR 업로드 이미지 준비 방식 비교")
+    parser.add_argument("paths", nargs="+", help="PDF 파일 또는 폴더")
+    parser.add_argument("--mbps", type=float, default=10.0, help="예상 업로드 대역폭 (Mbps)")
+    parser.add_argument("--max-bytes", type=int, default=MAX_BYTES)
+    parser.add_argument("--scanned-only", action="store_true", help="텍스트 레이어가 없는 페이지만 측정")
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    if pytesseract is None:
+        print("pytesseract가 없어 인식 일치율은 측정하지 않습니다. (pip install pytesseract)")
+
+    report = {}
+    print(f"{'file':30} {'page':>4} {'mode':8} {'dpi':>4} {'KB':>8} {'e2e(s)':>8} {'parity':>7}")
+    for pdf_path in collect_pdfs(args.paths):
+        doc = open_pdf(pdf_path)
+        report[pdf_path] = []
+        for page_number, source in classify_pages(doc):
+            if args.scanned_only and source != "ocr":
+                continue
+            result = benchmark_page(doc[page_number - 1], args.mbps, args.max_bytes)
+            result["page"] = page_number
+            report[pdf_path].append(result)
+            for mode in ["baseline"] + MODES:
+                stat = result[mode]
+                parity = "-" if stat["parity"] is None else f"{stat['parity']:.2f}"
+                print(f"{os.path.basename(pdf_path)[:30]:30} {page_number:4} {mode:8} {stat['dpi']:4} "
+                      f"{stat['bytes'] / 1024:8.0f} {stat['end_to_end_seconds']:8.3f} {parity:>7}")
+        doc.close()
+
+    summary = summarize(report)
+    for mode, stat in summary.items():
+        parity = "-" if stat["median_parity"] is None else f"{stat['median_parity']:.2f}"
+        print(f"[{mode}] 합계 {stat['bytes'] / 1024:.0f}KB (절약 {stat['saved_bytes'] / 1024:.0f}KB), "
+              f"상한 초과 {stat['over_limit_pages']}페이지, "
+              f"end-to-end 중앙값 {stat['median_end_to_end']:.3f}초, 일치율 중앙값 {parity}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"pages": report, "summary": summary}, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
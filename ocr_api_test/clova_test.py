@@ -2,9 +2,10 @@ import requests
 import uuid
 import time
 import json
-from pdf2image import convert_from_path
 import os
 import shutil
+from image_prep import prepare_page
+from pdf_router import normalize_clova_page, route_pdf
 
 # Clova OCR API 설정
 api_url = 'https://8t3q98q5p4.apigw.ntruss.com/custom/v1/43241/4332772734bad9042b8d3b16ced05e86995eb0deddc51a2b60bd558c497bcc97/general'
@@ -15,37 +16,32 @@ pdf_file = '/Users/zionchoi/Desktop/test_pdf/EU2506-0217 SIMMTECH 6-13申告.pdf
 
 total_start = time.time()
 
-def convert_pdf_to_images(pdf_path, output_dir='temp_images'):
-    """PDF를 이미지로 변환"""
+# 스캔 페이지 이미지 모드 ('gray': 흑백 JPEG, 'binary': 이진화 PNG)
+image_mode = 'gray'
+
+def convert_pages_to_images(doc, page_numbers, output_dir='temp_images'):
+    """텍스트 레이어가 없는 페이지만 이미지로 변환 (페이지별 DPI/압축 조정)"""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    # PDF를 이미지로 변환
-    images = convert_from_path(pdf_path)
-    image_paths = []
-    
-    for i, image in enumerate(images):
-        image_path = os.path.join(output_dir, f'page_{i+1}.jpg')
-        image.save(image_path, 'JPEG')
-        image_paths.append(image_path)
+    images = []
+    for page_number in page_numbers:
+        prepared = prepare_page(doc[page_number - 1], mode=image_mode)
+        image_path = os.path.join(output_dir, f'page_{page_number}.{prepared["format"]}')
+        with open(image_path, 'wb') as f:
+            f.write(prepared['data'])
+        print(f"페이지 {page_number}: {prepared['dpi']} DPI, {prepared['bytes'] / 1024:.0f}KB")
+        if prepared['over_limit']:
+            print(f"페이지 {page_number}: 최저 DPI/품질로도 크기 상한을 넘었습니다 ({prepared['bytes'] / 1024:.0f}KB)")
+        images.append((image_path, prepared))
     
-    return image_paths
-
-# PDF를 이미지로 변환
-print("PDF를 이미지로 변환 중...")
-pdf2img_start = time.time()
-image_paths = convert_pdf_to_images(pdf_file)
-pdf2img_end = time.time()
-print(f"PDF 변환 소요 시간: {pdf2img_end - pdf2img_start:.2f}초")
+    return images
 
-all_results = []
-for i, image_path in enumerate(image_paths):
-    print(f"페이지 {i+1} OCR 처리 중...")
-    ocr_start = time.time()
+def request_clova_ocr(image_path, image_format='jpg'):
     request_json = {
         'images': [
             {
-                'format': 'jpg',
+                'format': image_format,
                 'name': 'demo'
             }
         ],
@@ -55,22 +51,54 @@ for i, image_path in enumerate(image_paths):
         'lang': 'ko, ja'
     }
     payload = {'message': json.dumps(request_json).encode('UTF-8')}
-    files = [
-        ('file', open(image_path, 'rb'))
-    ]
-    headers = {
-        'X-OCR-SECRET': secret_key
-    }
-    response = requests.request("POST", api_url, headers=headers, data=payload, files=files)
+    with open(image_path, 'rb') as f:
+        files = [
+            ('file', f)
+        ]
+        headers = {
+            'X-OCR-SECRET': secret_key
+        }
+        response = requests.request("POST", api_url, headers=headers, data=payload, files=files)
     print(response.text)
-    all_results.append(response.json())
-    ocr_end = time.time()
-    print(f"페이지 {i+1} OCR 소요 시간: {ocr_end - ocr_start:.2f}초")
+    return response.json()
 
-# 결과를 파일로 저장 (원본 JSON)
+all_results = []
+
+def ocr_scanned_pages(doc, page_numbers):
+    """스캔 페이지만 이미지 변환 후 Clova OCR"""
+    print(f"스캔 페이지 {page_numbers} 이미지 변환 중...")
+    pdf2img_start = time.time()
+    images = convert_pages_to_images(doc, page_numbers)
+    pdf2img_end = time.time()
+    print(f"PDF 변환 소요 시간: {pdf2img_end - pdf2img_start:.2f}초")
+
+    pages = {}
+    for page_number, (image_path, prepared) in zip(page_numbers, images):
+        print(f"페이지 {page_number} OCR 처리 중...")
+        ocr_start = time.time()
+        result = request_clova_ocr(image_path, prepared['format'])
+        all_results.append(result)
+        rect = doc[page_number - 1].rect
+        # OCR 좌표는 페이지별로 선택한 DPI 기준
+        pages[page_number] = normalize_clova_page(result, page_number, rect.width, rect.height, dpi=prepared['dpi'])
+        ocr_end = time.time()
+        print(f"페이지 {page_number} OCR 소요 시간: {ocr_end - ocr_start:.2f}초")
+    return pages
+
+# 텍스트 레이어가 있는 페이지는 로컬 추출, 나머지만 OCR
+print("페이지별 텍스트 레이어 확인 중...")
+pages = route_pdf(pdf_file, ocr_scanned_pages)
+for page in pages:
+    print(f"페이지 {page['page']}: {page['source']} (단어 {len(page['words'])}개)")
+
+# 결과를 파일로 저장 (OCR 원본 JSON)
 with open('clova_result.json', 'w', encoding='utf-8') as f:
     json.dump(all_results, f, ensure_ascii=False, indent=2)
 
+# 정규화 결과 저장 (텍스트 레이어 + OCR 페이지 공통 형식)
+with open('clova_normalized.json', 'w', encoding='utf-8') as f:
+    json.dump(pages, f, ensure_ascii=False, indent=2)
+
 # 임시 이미지 파일 정리
 temp_dir = 'temp_images'
 if os.path.exists(temp_dir):
@@ -78,4 +106,4 @@ if os.path.exists(temp_dir):
 
 total_end = time.time()
 print(f"전체 소요 시간: {total_end - total_start:.2f}초")
-print("OCR 완료! 결과가 clova_result.json에 저장되었습니다.")
\ No newline at end of file
+print("OCR 완료! 결과가 clova_result.json, clova_normalized.json에 저장되었습니다.")
\ No newline at end of file
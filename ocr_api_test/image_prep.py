@@ -0,0 +1,137 @@
+"""
+OCR 업로드용 페이지 이미지 준비
+- 페이지 글자 크기를 추정해 페이지별 DPI 선택 (작은 글씨는 높게, 큰 글씨는 낮게)
+- 컬러 대신 흑백(gray, JPEG) 또는 이진화(binary, 1비트 PNG) 출력
+- 크기 상한(max_bytes)을 넘으면 JPEG 품질 -> 해상도 순으로 낮춤 (MIN_DPI까지 낮춰도 넘으면 over_limit=True)
+- 기존 방식(200 DPI 컬러 JPEG) 대비 크기 비교는 benchmark_image_prep.py에서만 계산 (업로드 경로에서 페이지를 다시 렌더링하지 않음)
+
+사용 예:
+    prepared = prepare_page(doc[0])
+    print(prepared["dpi"], prepared["bytes"], prepared["over_limit"])
+"""
+import io
+
+import numpy as np
+from PIL import Image
+
+from pdf_router import render_page
+
+# 기존 방식 (convert_from_path 기본값 200 DPI, 컬러, PIL JPEG 기본 품질)
+BASELINE_DPI = 200
+
+# 글자 크기 추정용 저해상도 렌더링 DPI
+PROBE_DPI = 100
+# OCR이 안정적으로 읽는 텍스트 줄 높이 (픽셀)
+TARGET_LINE_PX = 20
+MIN_DPI = 120
+MAX_DPI = 300
+# 업로드 이미지 크기 상한
+MAX_BYTES = 500 * 1024
+JPEG_QUALITIES = [75, 65, 55, 45]
+# 품질을 최저로 내려도 상한을 넘을 때 해상도 축소 비율
+DOWNSCALE = 0.85
+
+def otsu_threshold(gray):
+    """
+    흑백 이미지 배열(0~255)의 Otsu 이진화 임계값을 계산합니다.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = np.divide(sum_bg, weight_bg, out=np.zeros(256), where=weight_bg > 0)
+    mean_fg = np.divide(sum_bg[-1] - sum_bg, weight_fg, out=np.zeros(256), where=weight_fg > 0)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+def estimate_line_height(page, probe_dpi=PROBE_DPI):
+    """
+    페이지의 대표 텍스트 줄 높이(포인트)를 추정합니다.
+    저해상도로 렌더링 후 가로 투영(행별 어두운 픽셀 비율)에서 연속된 텍스트 행 높이의 중앙값을 사용합니다.
+    :return: 줄 높이(포인트), 텍스트를 못 찾으면 None
+    """
+    gray = np.asarray(render_page(page, dpi=probe_dpi).convert("L"))
+    dark = gray < otsu_threshold(gray)
+    row_ink = dark.mean(axis=1)
+    # 표 테두리(가로줄)처럼 거의 전체가 어두운 행은 제외
+    text_rows = (row_ink > 0.005) & (row_ink < 0.5)
+
+    heights = []
+    run = 0
+    for is_text in text_rows:
+        if is_text:
+            run += 1
+        elif run:
+            heights.append(run)
+            run = 0
+    if run:
+        heights.append(run)
+    # 1~2픽셀짜리는 선/잡음
+    heights = [h for h in heights if h > 2]
+    if not heights:
+        return None
+    return float(np.median(heights)) * 72.0 / probe_dpi
+
+def choose_dpi(line_height, target_line_px=TARGET_LINE_PX, min_dpi=MIN_DPI, max_dpi=MAX_DPI):
+    """
+    줄 높이가 target_line_px 픽셀이 되도록 DPI를 선택합니다. (추정 실패 시 기존 DPI)
+    """
+    if not line_height:
+        return BASELINE_DPI
+    dpi = target_line_px * 72.0 / line_height
+    return int(round(min(max(dpi, min_dpi), max_dpi)))
+
+def binarize(image):
+    gray = np.asarray(image.convert("L"))
+    return Image.fromarray(gray >= otsu_threshold(gray))
+
+def encode_image(image, mode="gray", quality=JPEG_QUALITIES[0]):
+    """
+    :param mode: "gray" (JPEG) 또는 "binary" (1비트 PNG)
+    :return: (bytes, format)
+    """
+    buffer = io.BytesIO()
+    if mode == "binary":
+        binarize(image).save(buffer, "PNG", optimize=True)
+        return buffer.getvalue(), "png"
+    image.convert("L").save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), "jpg"
+
+def prepare_page(page, mode="gray", max_bytes=MAX_BYTES, dpi=None):
+    """
+    페이지 하나를 OCR 업로드용 이미지로 변환합니다.
+    :param mode: "gray" 또는 "binary"
+    :param dpi: 지정하면 글자 크기 추정 없이 사용
+    :return: {"data", "format", "dpi", "quality", "bytes", "over_limit"}
+             over_limit: MIN_DPI / 최저 품질까지 낮춰도 max_bytes를 넘은 경우 True
+    """
+    if mode not in ("gray", "binary"):
+        raise ValueError(f"지원하지 않는 mode입니다: {mode}")
+    if dpi is None:
+        dpi = choose_dpi(estimate_line_height(page))
+
+    image = render_page(page, dpi=dpi)
+    while True:
+        qualities = JPEG_QUALITIES if mode == "gray" else [None]
+        for quality in qualities:
+            data, image_format = encode_image(image, mode, quality)
+            if len(data) <= max_bytes:
+                break
+        # 최저 품질로도 상한 초과 시 해상도를 낮춰 다시 시도 (MIN_DPI 아래로는 내리지 않음)
+        if len(data) <= max_bytes or dpi * DOWNSCALE < MIN_DPI:
+            break
+        dpi = int(dpi * DOWNSCALE)
+        image = render_page(page, dpi=dpi)
+
+    return {
+        "data": data,
+        "format": image_format,
+        "dpi": dpi,
+        "quality": quality,
+        "bytes": len(data),
+        "over_limit": len(data) > max_bytes,
+    }
@@ -0,0 +1,160 @@
+"""
+PDF 페이지별 라우터
+- 텍스트 레이어가 있는 디지털 PDF 페이지: 로컬에서 단어+좌표 추출 (네트워크/OCR 비용 없음)
+- 텍스트 레이어가 없는 스캔 페이지만: 이미지 변환 후 원격 OCR (Clova / Upstage)
+- 두 경로 모두 같은 정규화 형식으로 반환
+
+정규화 형식 (좌표는 PDF 포인트 단위, 좌상단 원점):
+    {"page": 1, "source": "text_layer" | "ocr", "width": 595.0, "height": 842.0,
+     "words": [{"text": "INVOICE", "bbox": [x0, y0, x1, y1]}, ...]}
+
+PyMuPDF가 필요합니다: pip install pymupdf
+"""
+import io
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# 텍스트 레이어로 인정할 최소 단어 수 (페이지 번호/워터마크만 있는 스캔 페이지 제외)
+MIN_TEXT_WORDS = 5
+
+def open_pdf(pdf_path):
+    if pymupdf is None:
+        raise ImportError("PDF 텍스트 레이어 확인에는 PyMuPDF가 필요합니다: pip install pymupdf")
+    return pymupdf.open(pdf_path)
+
+def text_layer_words(page):
+    """
+    페이지의 텍스트 레이어에서 단어와 좌표를 추출합니다.
+    """
+    words = []
+    for x0, y0, x1, y1, text, *_ in page.get_text("words"):
+        text = text.strip()
+        if text:
+            words.append({"text": text, "bbox": [round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2)]})
+    return words
+
+def has_text_layer(page, min_words=MIN_TEXT_WORDS):
+    return len(text_layer_words(page)) >= min_words
+
+def classify_pages(doc, min_words=MIN_TEXT_WORDS):
+    """
+    :return: [(page_number, "text_layer" | "ocr"), ...] (page_number는 1부터)
+    """
+    return [(i + 1, "text_layer" if has_text_layer(page, min_words) else "ocr") for i, page in enumerate(doc)]
+
+def text_layer_page(page, page_number):
+    return {
+        "page": page_number,
+        "source": "text_layer",
+        "width": round(page.rect.width, 2),
+        "height": round(page.rect.height, 2),
+        "words": text_layer_words(page),
+    }
+
+def render_page(page, dpi=200):
+    """
+    페이지를 PIL 이미지로 변환합니다. (convert_from_path 기본값과 같은 200 DPI)
+    """
+    from PIL import Image
+
+    pixmap = page.get_pixmap(dpi=dpi)
+    return Image.open(io.BytesIO(pixmap.tobytes("png")))
+
+def extract_pages_pdf(doc, page_numbers):
+    """
+    지정한 페이지만 담은 새 PDF(bytes)를 만듭니다. (스캔 페이지만 업로드할 때 사용)
+    """
+    subset = pymupdf.open()
+    for page_number in page_numbers:
+        subset.insert_pdf(doc, from_page=page_number - 1, to_page=page_number - 1)
+    data = subset.tobytes()
+    subset.close()
+    return data
+
+def vertices_bbox(vertices, scale_x, scale_y):
+    xs = [v.get("x", 0) * scale_x for v in vertices]
+    ys = [v.get("y", 0) * scale_y for v in vertices]
+    return [round(min(xs), 2), round(min(ys), 2), round(max(xs), 2), round(max(ys), 2)]
+
+def normalize_clova_page(result, page_number, width, height, dpi=200):
+    """
+    Clova General OCR 응답(이미지 1장)을 정규화합니다.
+    이미지 픽셀 좌표는 dpi 기준으로 PDF 포인트로 변환합니다.
+    """
+    scale = 72.0 / dpi
+    words = []
+    for image in result.get("images", []):
+        for field in image.get("fields", []):
+            text = field.get("inferText", "").strip()
+            vertices = field.get("boundingPoly", {}).get("vertices", [])
+            if text and vertices:
+                words.append({"text": text, "bbox": vertices_bbox(vertices, scale, scale)})
+    return {"page": page_number, "source": "ocr", "width": round(width, 2), "height": round(height, 2), "words": words}
+
+def normalize_upstage_pages(result, page_numbers, page_sizes):
+    """
+    Upstage OCR 응답을 정규화합니다.
+    :param page_numbers: 업로드한 PDF의 각 페이지가 원본에서 몇 페이지였는지
+    :param page_sizes: {page_number: (width, height)} 원본 페이지 크기(포인트)
+    """
+    pages = {}
+    for i, upstage_page in enumerate(result.get("pages", [])):
+        if i >= len(page_numbers):
+            break
+        page_number = page_numbers[i]
+        width, height = page_sizes[page_number]
+        scale_x = width / upstage_page["width"] if upstage_page.get("width") else 1.0
+        scale_y = height / upstage_page["height"] if upstage_page.get("height") else 1.0
+        words = []
+        for word in upstage_page.get("words", []):
+            text = word.get("text", "").strip()
+            vertices = word.get("boundingBox", {}).get("vertices", [])
+            if text and vertices:
+                words.append({"text": text, "bbox": vertices_bbox(vertices, scale_x, scale_y)})
+        pages[page_number] = {"page": page_number, "source": "ocr", "width": round(width, 2), "height": round(height, 2), "words": words}
+    return pages
+
+def route_pdf(pdf_path, ocr_pages, min_words=MIN_TEXT_WORDS):
+    """
+    텍스트 레이어가 있는 페이지는 로컬 추출, 나머지는 ocr_pages(doc, page_numbers)로 처리합니다.
+    :param ocr_pages: (doc, [page_number, ...]) -> {page_number: 정규화 페이지}
+    :return: 페이지 순서대로 정규화 페이지 목록
+    """
+    doc = open_pdf(pdf_path)
+    try:
+        routes = classify_pages(doc, min_words)
+        pages = {}
+        for page_number, source in routes:
+            if source == "text_layer":
+                pages[page_number] = text_layer_page(doc[page_number - 1], page_number)
+        scanned = [page_number for page_number, source in routes if source == "ocr"]
+        if scanned:
+            pages.update(ocr_pages(doc, scanned))
+        return [pages[page_number] for page_number, _ in routes if page_number in pages]
+    finally:
+        doc.close()
+
+def pages_to_text(pages):
+    """
+    정규화 페이지를 줄 단위 텍스트로 변환합니다. (같은 줄 = 세로 중심이 가까운 단어)
+    """
+    lines = []
+    for page in pages:
+        words = sorted(page["words"], key=lambda w: ((w["bbox"][1] + w["bbox"][3]) / 2, w["bbox"][0]))
+        current = []
+        current_y = None
+        for word in words:
+            y = (word["bbox"][1] + word["bbox"][3]) / 2
+            height = word["bbox"][3] - word["bbox"][1]
+            if current and abs(y - current_y) > max(height, 1) / 2:
+                lines.append(" ".join(w["text"] for w in sorted(current, key=lambda w: w["bbox"][0])))
+                current = []
+            if not current:
+                current_y = y
+            current.append(word)
+        if current:
+            lines.append(" ".join(w["text"] for w in sorted(current, key=lambda w: w["bbox"][0])))
+    return "\n".join(lines)
@@ -1,6 +1,7 @@
 import requests
 import json
 import time
+from pdf_router import extract_pages_pdf, normalize_upstage_pages, pages_to_text, route_pdf
  
 api_key = "up_JRsVNVkblzi60ZHnaFajLOo7nm5pG"
 filename = "/Users/zionchoi/Desktop/test_pdf/EU2506-0217 SIMMTECH 6-13申告.pdf"
@@ -10,26 +11,43 @@ headers = {"Authorization": f"Bearer {api_key}"}
 
 total_start = time.time()
 
-file_open_start = time.time()
-files = {"document": open(filename, "rb")}
-file_open_end = time.time()
-print(f"파일 열기 소요 시간: {file_open_end - file_open_start:.2f}초")
+raw_results = []
 
-data = {"model": "ocr"}
-ocr_start = time.time()
-response = requests.post(url, headers=headers, files=files, data=data)
-ocr_end = time.time()
-print(f"OCR API 요청 소요 시간: {ocr_end - ocr_start:.2f}초")
- 
-print(response.json())
+def ocr_scanned_pages(doc, page_numbers):
+    """텍스트 레이어가 없는 페이지만 새 PDF로 묶어 업로드"""
+    file_open_start = time.time()
+    document = extract_pages_pdf(doc, page_numbers)
+    file_open_end = time.time()
+    print(f"스캔 페이지 {page_numbers} 추출 소요 시간: {file_open_end - file_open_start:.2f}초")
+
+    files = {"document": ("scanned_pages.pdf", document, "application/pdf")}
+    data = {"model": "ocr"}
+    ocr_start = time.time()
+    response = requests.post(url, headers=headers, files=files, data=data)
+    ocr_end = time.time()
+    print(f"OCR API 요청 소요 시간: {ocr_end - ocr_start:.2f}초")
+
+    result = response.json()
+    print(result)
+    raw_results.append(result)
+    page_sizes = {n: (doc[n - 1].rect.width, doc[n - 1].rect.height) for n in page_numbers}
+    return normalize_upstage_pages(result, page_numbers, page_sizes)
 
-# Save full JSON
+# 텍스트 레이어가 있는 페이지는 로컬 추출, 나머지만 업로드
+pages = route_pdf(filename, ocr_scanned_pages)
+for page in pages:
+    print(f"페이지 {page['page']}: {page['source']} (단어 {len(page['words'])}개)")
+
+# Save full JSON (OCR 원본 응답이 없으면 빈 목록)
 with open("result.json", "w", encoding="utf-8") as f:
-    json.dump(response.json(), f, ensure_ascii=False, indent=2)
+    json.dump(raw_results[0] if len(raw_results) == 1 else raw_results, f, ensure_ascii=False, indent=2)
+
+# Save normalized pages (텍스트 레이어 + OCR 페이지 공통 형식)
+with open("result_normalized.json", "w", encoding="utf-8") as f:
+    json.dump(pages, f, ensure_ascii=False, indent=2)
 
 # Save extracted text only
-result = response.json()
-text = result.get("text")
+text = pages_to_text(pages)
 if text:
     with open("result.txt", "w", encoding="utf-8") as f:
         f.write(text)
@@ -0,0 +1,101 @@
+"""
+Shipper / Consignee 등 당사자(party) 블록 추출
+- 검색 영역(과 블록이 내려갈 행)을 한 번만 문자열 배열로 만들고, 키워드 hit 행렬(키워드 x 행 x 열)을 한 번에 계산
+- 헤더 행 찾기(first_row)와 블록 추출(block)이 같은 배열을 사용 (행마다 DataFrame 행을 다시 만들지 않음)
+- 키워드 셀 오른쪽 블록(최대 right칸)과 아래 블록(최대 down행)을 배열 슬라이싱과 빈 행 마스크로 잘라냄
+
+블록 규칙 (기존 extract_multiline / get_next_lines와 동일):
+- 오른쪽: 키워드가 있는 첫 셀 오른쪽 1~right칸 중 비어 있지 않고 제외 키워드가 없는 셀
+- 아래: 다음 행부터 최대 down행을 " "로 이어 붙인 줄. 빈 줄이면 중단, 제외 키워드가 있는 줄은 건너뜀
+- NaN / "nan" 셀은 빈 문자열로 취급
+
+문자열 배열은 object 배열로 둡니다. (고정 폭 유니코드 배열은 가장 긴 셀 길이 x 셀 수만큼 메모리를 씀)
+
+사용 예:
+    blocks = PartyBlocks(df, ["shipper", "consignee"], 0, 60)
+    row_pos = blocks.first_row(["shipper"])
+    lines = blocks.block(row_pos, ["shipper"]) if row_pos is not None else []
+"""
+import numpy as np
+import pandas as pd
+
+def cell_text(value):
+    if pd.isna(value):
+        return ""
+    text = str(value)
+    return "" if text.lower() == "nan" else text
+
+def contains(keyword):
+    return np.frompyfunc(lambda text: keyword in text, 1, 1)
+
+to_text = np.frompyfunc(cell_text, 1, 1)
+to_lower = np.frompyfunc(str.lower, 1, 1)
+is_blank = np.frompyfunc(lambda text: not text.strip(), 1, 1)
+
+class PartyBlocks:
+    """
+    df의 row_start ~ row_end 행에 대한 문자열 배열과 키워드 hit 행렬
+    :param keywords: hit 행렬을 만들 키워드 (헤더/블록/제외 키워드는 이 안에서 골라야 함)
+    """
+    def __init__(self, df, keywords, row_start=0, row_end=None):
+        n_rows = len(df)
+        self.row_start = max(0, row_start)
+        self.row_end = n_rows if row_end is None else min(row_end, n_rows)
+        self.keywords = list(keywords)
+        window = df.iloc[self.row_start:self.row_end].to_numpy(dtype=object)
+        self.text = to_text(window) if window.size else np.empty(window.shape, dtype=object)
+        lower = to_lower(self.text) if window.size else self.text
+        self.hits = np.stack([contains(keyword)(lower).astype(bool) for keyword in self.keywords]) if self.keywords else None
+
+    def keyword_hits(self, keywords):
+        # keywords 중 하나라도 있는 셀 (행 x 열)
+        return self.hits[[self.keywords.index(keyword) for keyword in keywords]].any(axis=0)
+
+    def first_row(self, keywords, bounds=None):
+        """
+        keywords 중 하나가 있는 첫 행 위치 (df 기준), 없으면 None
+        :param bounds: (row_start, row_end, col_start, col_end) 검색 영역 (search_region.region_bounds, None이면 전체)
+        """
+        hits = self.keyword_hits(keywords)
+        offset = self.row_start
+        if bounds is not None:
+            row_start, row_end, col_start, col_end = bounds
+            offset = max(row_start, self.row_start)
+            hits = hits[offset - self.row_start:max(row_end - self.row_start, 0), col_start:col_end]
+        rows = np.flatnonzero(hits.any(axis=1))
+        return None if rows.size == 0 else int(rows[0]) + offset
+
+    def block(self, row_pos, keywords, exclude=None, right=3, down=4, drop_nan=True):
+        """
+        :param row_pos: 키워드가 있는 행 위치 (df 기준, row_start~row_end 범위 안)
+        :param keywords: 키워드 셀을 찾을 키워드
+        :param exclude: 블록에서 제외할 키워드 (None이면 keywords)
+        :param drop_nan: 오른쪽 셀 값이 공백 제거 후 "nan"이면 제외 (extract_multiline 규칙)
+        :return: 오른쪽 셀 값 + 아래 줄 목록
+        """
+        exclude_hits = self.keyword_hits(exclude or keywords)
+        r = row_pos - self.row_start
+        lines = []
+
+        # 1. 같은 행에서 키워드 오른쪽 셀들
+        cols = np.flatnonzero(self.keyword_hits(keywords)[r])
+        if cols.size:
+            col = int(cols[0])
+            right_cells = self.text[r, col + 1:col + 1 + right]
+            excluded = exclude_hits[r, col + 1:col + 1 + right]
+            for cell, skip in zip(right_cells, excluded):
+                cell = cell.strip()
+                if cell and not skip and not (drop_nan and cell.lower() == "nan"):
+                    lines.append(cell)
+
+        # 2. 아래 행들 (빈 행에서 중단, 제외 키워드가 있는 행은 건너뜀)
+        below = slice(r + 1, min(r + 1 + down, self.text.shape[0]))
+        # 공백뿐인 셀은 이어 붙인 줄에서 strip되므로 빈 셀로 봄
+        empty_rows = is_blank(self.text[below]).astype(bool).all(axis=1)
+        excluded_rows = exclude_hits[below].any(axis=1)
+        for offset, (empty, excluded) in enumerate(zip(empty_rows, excluded_rows)):
+            if empty:
+                break
+            if not excluded:
+                lines.append(" ".join(self.text[r + 1 + offset]).strip())
+        return lines
@@ -0,0 +1,291 @@
+"""
+한 번 읽기 파이프라인
+- 워크북을 한 번 열고 시트 그리드도 시트당 한 번만 읽음 (read_grid)
+- 추출기(stage)는 같은 그리드에서 필요한 DataFrame(header/문자열 변환 여부)을 받아 실행
+  (같은 형태의 DataFrame은 한 번만 만들어 stage끼리 공유)
+- stage는 기본적으로 순서대로 실행하고, 결과를 문서 하나의 결과로 합쳐 stage별 시간과 함께 반환
+  (stage는 파이썬 코드라 GIL을 잡고 있으므로 스레드로 동시에 실행해도 빨라지지 않음)
+- processes=True이면 워크북을 shared_grid.SharedWorkbook으로 공유 메모리에 한 번 기록하고
+  stage를 프로세스별로 실행 (stage가 읽을 시트를 처음에 모두 변환하므로, 큰 시트에서 stage가 여러 개일 때만 이득)
+
+각 stage의 시트 순회/종료 규칙은 기존 진입 함수와 같습니다.
+    all_fields         - extract_from_excel
+    shipper_consignee  - extract_single_value
+    multi_targets      - extract_multi_targets (첫 시트만)
+    table_header       - extract_table_with_dynamic_header
+    table_value        - find_table_value_test 실행부 (그룹 결과)
+
+prescreen=True이면 .xlsx는 워크북을 열기 전에 zip 수준에서 시트별 라벨을 확인해(xlsx_prescreen),
+stage마다 자기 키워드가 있는 시트만 읽습니다. (multi_targets는 첫 시트 규칙이라 제외)
+모든 stage에 남은 시트가 없으면 워크북을 열지 않고 빈 결과를 반환합니다.
+
+사용 예:
+    result = run_pipeline("invoice.xlsx", stages=["all_fields", "table_value"])
+    result = run_pipeline("invoice.xlsx", processes=True, max_workers=4)
+    python pipeline.py invoice.xlsx --stage all_fields shipper_consignee
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from excel_reader import grid_to_frame, open_workbook, read_grid
+from extract_all_fields import KEYWORD_MAP, MULTILINE_KEYWORDS, extract_all_fields
+from find_shipper_consignee import extract_shipper_consignee
+from find_single_value import TARGETS, extract_targets
+from find_table_value import extract_table_from_df
+from find_table_value_test import find_table_value, group_by_main_keys_and_collect_por_no
+from shared_grid import SharedWorkbook
+from xlsx_prescreen import prescreen as prescreen_sheets
+
+# stage별 기본 옵션 (각 모듈 실행부의 값)
+DEFAULT_OPTIONS = {
+    "multi_targets": {"targets": TARGETS},
+    "table_header": {
+        "keyword": "C/T NO",
+        "header_above": 1,
+        "header_below": 0,
+        "height": None,
+        "group_size": 1,
+        "header_ranges": None,
+    },
+}
+
+# 사전 선별에 쓰는 stage별 라벨 키워드 (table_header는 옵션의 keyword 사용)
+STAGE_KEYWORDS = {
+    "all_fields": MULTILINE_KEYWORDS + [keyword for keywords in KEYWORD_MAP.values() for keyword in keywords],
+    "shipper_consignee": ["shipper", "consignee"],
+    "table_value": ["case no"],
+}
+
+# stage가 읽는 DataFrame의 header (없으면 0)
+STAGE_HEADERS = {"table_value": None}
+
+class SheetStore:
+    """
+    워크북 시트를 한 번만 읽어 두고 stage들이 공유하는 DataFrame을 만들어 줍니다.
+    - grid: 시트당 한 번 read_grid
+    - frame(sheet, header, view): (시트, header, view)별로 한 번만 만들어 캐시
+      view: "raw" (xls.parse 그대로), "str" (.astype(str)), "str_filled" (.astype(str).fillna(''))
+    stage는 받은 DataFrame을 수정하지 않아야 합니다.
+    """
+    def __init__(self, xls):
+        self.xls = xls
+        self.sheet_names = xls.sheet_names
+        self.load_seconds = 0.0
+        self._grids = {}
+        self._frames = {}
+
+    def grid(self, sheet_name):
+        if sheet_name not in self._grids:
+            start = time.perf_counter()
+            self._grids[sheet_name] = read_grid(self.xls.iter_rows(sheet_name), sheet_name=sheet_name, **self.xls.limits)
+            self.load_seconds += time.perf_counter() - start
+        return self._grids[sheet_name]
+
+    def frame(self, sheet_name, header=0, view="raw"):
+        key = (sheet_name, header, view)
+        if key not in self._frames:
+            if view == "raw":
+                data, info = self.grid(sheet_name)
+                df = grid_to_frame(data, header)
+                df.attrs.update(info)
+            elif view == "str":
+                df = self.frame(sheet_name, header).astype(str)
+            elif view == "str_filled":
+                df = self.frame(sheet_name, header, "str").fillna('')
+            else:
+                raise ValueError(f"지원하지 않는 view입니다: {view}")
+            self._frames[key] = df
+        return self._frames[key]
+
+def stage_sheets(store, options):
+    # 사전 선별로 좁힌 시트 목록 (없으면 전체 시트)
+    sheets = options.get("sheets")
+    return store.sheet_names if sheets is None else sheets
+
+# stage 함수: (store, options, layout_cache) -> 결과
+def stage_all_fields(store, options, layout_cache):
+    for sheet_name in stage_sheets(store, options):
+        extracted_data = extract_all_fields(store.frame(sheet_name), layout_cache=layout_cache,
+                                            search_regions=options.get("search_regions"))
+        if any(extracted_data.values()):
+            return {sheet_name: extracted_data}
+    return {}
+
+def stage_shipper_consignee(store, options, layout_cache):
+    for sheet_name in stage_sheets(store, options):
+        shipper, consignee = extract_shipper_consignee(store.frame(sheet_name, view="str"), layout_cache=layout_cache,
+                                                       search_regions=options.get("search_regions"))
+        if shipper or consignee:
+            return {sheet_name: {'shipper': shipper, 'consignee': consignee}}
+    return {}
+
+def stage_multi_targets(store, options, layout_cache):
+    for sheet_name in store.sheet_names[:1]:
+        return {sheet_name: extract_targets(store.frame(sheet_name, view="str"), options["targets"], layout_cache=layout_cache)}
+    return {}
+
+def stage_table_header(store, options, layout_cache):
+    for sheet_name in stage_sheets(store, options):
+        result = extract_table_from_df(
+            store.frame(sheet_name, view="str_filled"),
+            options["keyword"], options["header_above"], options["header_below"],
+            options["height"], options["group_size"], options["header_ranges"],
+        )
+        if result is not None:
+            return result
+    return []
+
+def stage_table_value(store, options, layout_cache):
+    for sheet_name in stage_sheets(store, options):
+        result = find_table_value(store.frame(sheet_name, header=None))
+        if result:
+            return group_by_main_keys_and_collect_por_no(result)
+    return []
+
+STAGES = {
+    "all_fields": stage_all_fields,
+    "shipper_consignee": stage_shipper_consignee,
+    "multi_targets": stage_multi_targets,
+    "table_header": stage_table_header,
+    "table_value": stage_table_value,
+}
+
+def run_stage(name, store, options, layout_cache):
+    """
+    :return: (결과, 오류 메시지, 초) - 오류가 나면 결과는 None
+    """
+    start = time.perf_counter()
+    try:
+        result, error = STAGES[name](store, options, layout_cache), None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return result, error, time.perf_counter() - start
+
+def stage_keywords(name, options):
+    if name == "table_header":
+        return [options["keyword"]]
+    return STAGE_KEYWORDS.get(name)
+
+def run_shared_stage(handle, name, options, layout_cache, quiet):
+    """
+    워커 프로세스에서 공유 워크북에 붙어 stage 하나를 실행합니다.
+    :return: ((결과, 오류 메시지, 초), layout_cache 변경 (changes, hits, misses) 또는 None)
+    """
+    redirect = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    shared = SharedWorkbook.attach(handle)
+    try:
+        with redirect:
+            output = run_stage(name, shared, options, layout_cache)
+    finally:
+        shared.close()
+    cache = None if layout_cache is None else (layout_cache.changes(), layout_cache.hits, layout_cache.misses)
+    return output, cache
+
+def publish_sheets(stages, stage_options):
+    # stage들이 읽을 수 있는 시트 (사전 선별이 없는 stage가 있으면 None = 전체)
+    selected = []
+    for name in stages:
+        sheets = stage_options[name].get("sheets")
+        if sheets is None:
+            return None
+        selected.extend(sheet for sheet in sheets if sheet not in selected)
+    return selected
+
+def run_pipeline(file_path, stages=None, engine=None, max_workers=None, layout_cache=None, options=None, quiet=True, prescreen=False,
+                 processes=False):
+    """
+    워크북을 한 번 읽고 stage들을 실행합니다.
+    :param stages: 실행할 stage 이름 목록 (None이면 STAGES 전체)
+    :param max_workers: processes=True일 때 프로세스 수 (None이면 stage 수)
+    :param options: {stage: {옵션}} - DEFAULT_OPTIONS를 덮어씀
+    :param quiet: 추출기의 디버그 print 숨김
+    :param prescreen: .xlsx는 zip 수준에서 라벨이 있는 시트를 먼저 확인해 stage별로 해당 시트만 읽음
+    :param processes: 시트를 공유 메모리에 기록하고 stage를 프로세스별로 실행 (False이면 순서대로 실행)
+    :return: {"file_path", "results": {stage: 결과}, "errors": {stage: 메시지}, "sheets": {stage: 선별된 시트}, "timings": {...}}
+    """
+    stages = list(STAGES) if stages is None else list(stages)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"알 수 없는 stage입니다: {', '.join(unknown)} (사용 가능: {', '.join(STAGES)})")
+    stage_options = {}
+    for name in stages:
+        stage_options[name] = dict(DEFAULT_OPTIONS.get(name, {}))
+        stage_options[name].update((options or {}).get(name, {}))
+
+    total_start = time.perf_counter()
+    prescreen_seconds = 0.0
+    if prescreen:
+        # 워크북을 열기 전에 zip 수준에서 선별 (관련 라벨이 없는 워크북은 열지 않음)
+        start = time.perf_counter()
+        keywords = {name: stage_keywords(name, stage_options[name]) for name in stages}
+        screen = prescreen_sheets(file_path, [keyword for words in keywords.values() if words for keyword in words])
+        if screen is not None:
+            for name, words in keywords.items():
+                if words:
+                    words = {word.lower() for word in words}
+                    stage_options[name]["sheets"] = [sheet for sheet, found in screen.items() if found & words]
+        prescreen_seconds = time.perf_counter() - start
+
+    # 모든 stage의 선별 시트가 비어 있으면 워크북을 열지 않음 (stage는 시트 없이 빈 결과 반환)
+    skip = all(stage_options[name].get("sheets") == [] for name in stages)
+    outputs = {}
+    load_seconds = 0.0
+    if processes and not skip:
+        # 공유 메모리 기록(워크북 열기 + 시트 읽기/변환)을 open 시간으로 기록
+        open_start = time.perf_counter()
+        shared = SharedWorkbook.publish(file_path, engine=engine, sheet_names=publish_sheets(stages, stage_options),
+                                        headers=sorted({STAGE_HEADERS.get(name, 0) for name in stages}, key=str))
+        open_seconds = time.perf_counter() - open_start
+        with shared, ProcessPoolExecutor(max_workers=max_workers or len(stages)) as pool:
+            futures = {name: pool.submit(run_shared_stage, shared.handle, name, stage_options[name], layout_cache, quiet)
+                       for name in stages}
+            hits, misses = (layout_cache.hits, layout_cache.misses) if layout_cache is not None else (0, 0)
+            for name, future in futures.items():
+                outputs[name], cache = future.result()
+                if cache is not None:
+                    changed, worker_hits, worker_misses = cache
+                    layout_cache.merge(changed)
+                    layout_cache.hits += worker_hits - hits
+                    layout_cache.misses += worker_misses - misses
+    else:
+        open_start = time.perf_counter()
+        store = None if skip else SheetStore(open_workbook(file_path, engine=engine))
+        open_seconds = time.perf_counter() - open_start
+        redirect = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+        with redirect:
+            for name in stages:
+                outputs[name] = run_stage(name, store, stage_options[name], layout_cache)
+        load_seconds = store.load_seconds if store is not None else 0.0
+
+    return {
+        "file_path": file_path,
+        "results": {name: output[0] for name, output in outputs.items()},
+        "errors": {name: output[1] for name, output in outputs.items() if output[1]},
+        "sheets": {name: stage_options[name]["sheets"] for name in stages if "sheets" in stage_options[name]},
+        "timings": {
+            "open": open_seconds,
+            "prescreen": prescreen_seconds,
+            # 시트 그리드 읽기 합계 (stage 시간에도 포함됨, processes=True이면 open에 포함되어 0)
+            "load": load_seconds,
+            "stages": {name: output[2] for name, output in outputs.items()},
+            "total": time.perf_counter() - total_start,
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워크북을 한 번 읽어 여러 추출기를 실행")
+    parser.add_argument("file", help="엑셀/CSV 파일")
+    parser.add_argument("--stage", nargs="+", choices=list(STAGES), default=None)
+    parser.add_argument("--engine", default=None)
+    parser.add_argument("--processes", action="store_true", help="시트를 공유 메모리에 기록하고 stage를 프로세스별로 실행")
+    parser.add_argument("--workers", type=int, default=None, help="--processes의 프로세스 수 (기본: stage 수)")
+    parser.add_argument("--prescreen", action="store_true", help=".xlsx 라벨 사전 선별로 읽을 시트 좁히기")
+    args = parser.parse_args()
+
+    result = run_pipeline(args.file, stages=args.stage, engine=args.engine, max_workers=args.workers, prescreen=args.prescreen,
+                          processes=args.processes)
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
@@ -0,0 +1,333 @@
+"""
+추출기 프로파일링 도구
+- 코퍼스(파일/폴더)의 각 파일을 추출기별로 실행하며 단계(load/parse/extract)별 시간과 메모리 할당을 기록
+- cProfile(.prof 저장) 또는 샘플링 프로파일러(flamegraph용 collapsed stack 저장) 선택
+- 저장된 기준값(baseline)과 비교해 단계 시간이 임계 비율 이상 늘면 실패(exit code 1)
+
+사용 예:
+    python profile_extractors.py corpus/ --extractor all_fields --profiler sample --out prof_out
+    python profile_extractors.py corpus/ --save-baseline baseline.json
+    python profile_extractors.py corpus/ --baseline baseline.json --threshold 20
+"""
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from excel_reader import ENGINES, open_workbook
+from extract_all_fields import extract_all_fields
+from find_shipper_consignee import extract_shipper_consignee
+from find_single_value import TARGETS, extract_targets
+from find_table_value import extract_table_from_df
+from find_table_value_test import find_table_value, group_by_main_keys_and_collect_por_no
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls", ".xlsb", ".ods", ".csv")
+
+class StageRecorder:
+    """
+    단계별 wall time과 메모리 할당을 누적합니다.
+    memory=True이면 tracemalloc으로 단계별 증가 바이트/최대 바이트를 함께 기록합니다.
+    """
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.current = None
+        self.stages = defaultdict(lambda: {"seconds": 0.0, "calls": 0, "alloc_blocks": 0, "alloc_bytes": 0, "peak_bytes": 0})
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        previous = self.current
+        self.current = name
+        blocks_before = sys.getallocatedblocks()
+        if self.memory:
+            bytes_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stat = self.stages[name]
+            stat["seconds"] += elapsed
+            stat["calls"] += 1
+            stat["alloc_blocks"] += sys.getallocatedblocks() - blocks_before
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                stat["alloc_bytes"] += current - bytes_before
+                stat["peak_bytes"] = max(stat["peak_bytes"], peak - bytes_before)
+            self.current = previous
+
+class StackSampler:
+    """
+    대상 스레드의 콜스택을 주기적으로 샘플링해 collapsed stack(flamegraph.pl / speedscope 호환)으로 모읍니다.
+    스택 맨 앞에는 파일명과 현재 단계 이름이 붙습니다.
+    """
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.counts = defaultdict(int)
+        self.label = None
+        self.recorder = None
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None or self.label is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stage = self.recorder.current if self.recorder is not None else None
+            prefix = [self.label] + ([stage] if stage else [])
+            self.counts[";".join(prefix + stack[::-1])] += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+def load_frame(xls, sheet_name, header=0, view="raw"):
+    """
+    추출기가 쓰는 시트 DataFrame (view는 pipeline.SheetStore.frame과 같음)
+    frame()이 있는 워크북(shared_grid.SharedWorkbook)은 미리 변환해 둔 view를 그대로 사용
+    """
+    if hasattr(xls, "frame"):
+        return xls.frame(sheet_name, header, view)
+    df = xls.parse(sheet_name, header=header)
+    if view != "raw":
+        df = df.astype(str)
+    if view == "str_filled":
+        df = df.fillna('')
+    return df
+
+# 추출기별 실행 함수: (xls, recorder) -> 결과. 시트 파싱과 추출을 단계로 나눠 기록
+def run_all_fields(xls, recorder):
+    for sheet_name in xls.sheet_names:
+        with recorder.stage("parse"):
+            df = load_frame(xls, sheet_name)
+        with recorder.stage("extract"):
+            extracted_data = extract_all_fields(df)
+        if any(extracted_data.values()):
+            return {sheet_name: extracted_data}
+    return {}
+
+def run_shipper_consignee(xls, recorder):
+    for sheet_name in xls.sheet_names:
+        with recorder.stage("parse"):
+            df = load_frame(xls, sheet_name, view="str")
+        with recorder.stage("extract"):
+            shipper, consignee = extract_shipper_consignee(df)
+        if shipper or consignee:
+            return {sheet_name: {'shipper': shipper, 'consignee': consignee}}
+    return {}
+
+def run_multi_targets(xls, recorder):
+    for sheet_name in xls.sheet_names:
+        with recorder.stage("parse"):
+            df = load_frame(xls, sheet_name, view="str")
+        with recorder.stage("extract"):
+            return {sheet_name: extract_targets(df, TARGETS)}
+    return {}
+
+def run_table_header(xls, recorder):
+    for sheet_name in xls.sheet_names:
+        with recorder.stage("parse"):
+            df = load_frame(xls, sheet_name, view="str_filled")
+        with recorder.stage("extract"):
+            result = extract_table_from_df(df, "C/T NO", header_above=1, group_size=1)
+        if result is not None:
+            return result
+    return []
+
+def run_table_value(xls, recorder):
+    for sheet_name in xls.sheet_names:
+        with recorder.stage("parse"):
+            df = load_frame(xls, sheet_name, header=None)
+        with recorder.stage("extract"):
+            result = find_table_value(df)
+            if result:
+                return group_by_main_keys_and_collect_por_no(result)
+    return []
+
+EXTRACTORS = {
+    "all_fields": run_all_fields,
+    "shipper_consignee": run_shipper_consignee,
+    "multi_targets": run_multi_targets,
+    "table_header": run_table_header,
+    "table_value": run_table_value,
+}
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith("~$"):
+                        files.append(os.path.join(root, name))
+        else:
+            files.append(path)
+    return files
+
+def profile_file(file_path, extractor, profiler, sampler, memory, out_dir, engine=None):
+    """
+    한 파일에 대해 추출기를 실행하고 단계별 측정값을 반환합니다.
+    """
+    recorder = StageRecorder(memory=memory)
+    # collapsed stack 형식은 공백을 구분자로 쓰므로 파일명 공백을 치환
+    label = f"{os.path.basename(file_path)}:{extractor}".replace(" ", "_")
+    profile = cProfile.Profile() if profiler == "cprofile" else None
+    if sampler is not None:
+        sampler.label = label
+        sampler.recorder = recorder
+
+    error = None
+    start = time.perf_counter()
+    if profile is not None:
+        profile.enable()
+    try:
+        # 추출기의 디버그 print는 측정에서 제외
+        with contextlib.redirect_stdout(io.StringIO()):
+            with recorder.stage("load"):
+                xls = open_workbook(file_path, engine=engine)
+            EXTRACTORS[extractor](xls, recorder)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        if profile is not None:
+            profile.disable()
+        if sampler is not None:
+            sampler.label = None
+    total = time.perf_counter() - start
+
+    if profile is not None and out_dir:
+        profile.dump_stats(os.path.join(out_dir, f"{label.replace(':', '__')}.prof"))
+
+    return {
+        "file": file_path,
+        "extractor": extractor,
+        "seconds": total,
+        "stages": dict(recorder.stages),
+        "error": error,
+    }
+
+def summarize(records):
+    # 추출기/단계별 합계 (baseline 비교 단위)
+    totals = defaultdict(float)
+    for record in records:
+        for stage, stat in record["stages"].items():
+            totals[f"{record['extractor']}/{stage}"] += stat["seconds"]
+        totals[f"{record['extractor']}/total"] += record["seconds"]
+    return dict(totals)
+
+def compare_baseline(summary, baseline, threshold, min_seconds):
+    """
+    기준값 대비 threshold(%) 이상 느려진 단계 목록을 반환합니다.
+    min_seconds 미만의 짧은 단계는 측정 잡음으로 보고 제외합니다.
+    """
+    regressions = []
+    for key, seconds in summary.items():
+        base = baseline.get(key)
+        if not base or max(base, seconds) < min_seconds:
+            continue
+        change = (seconds - base) / base * 100
+        if change > threshold:
+            regressions.append({"stage": key, "baseline": base, "current": seconds, "change_pct": change})
+    return regressions
+
+def print_table(records, summary):
+    print(f"{'file':40} {'extractor':18} {'stage':8} {'seconds':>9} {'blocks':>9}")
+    for record in records:
+        name = os.path.basename(record["file"])[:40]
+        for stage, stat in record["stages"].items():
+            print(f"{name:40} {record['extractor']:18} {stage:8} {stat['seconds']:9.4f} {stat['alloc_blocks']:9d}")
+        if record["error"]:
+            print(f"{name:40} {record['extractor']:18} 오류: {record['error']}")
+    print()
+    for key, seconds in sorted(summary.items()):
+        print(f"{key:40} {seconds:9.4f}초")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="엑셀 추출기 단계별 프로파일링")
+    parser.add_argument("paths", nargs="+", help="엑셀 파일 또는 폴더")
+    parser.add_argument("--extractor", action="append", choices=sorted(EXTRACTORS), help="실행할 추출기 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--engine", choices=ENGINES, help="읽기 엔진 (기본: 자동 선택)")
+    parser.add_argument("--profiler", choices=["none", "cprofile", "sample"], default="none")
+    parser.add_argument("--interval", type=float, default=0.001, help="샘플링 간격(초)")
+    parser.add_argument("--memory", action="store_true", help="tracemalloc으로 단계별 할당 바이트 기록 (느려짐)")
+    parser.add_argument("--repeat", type=int, default=1, help="파일별 반복 횟수 (가장 빠른 실행을 사용)")
+    parser.add_argument("--out", help="report.json / .prof / stacks.collapsed 저장 폴더")
+    parser.add_argument("--baseline", help="비교할 기준값 JSON")
+    parser.add_argument("--save-baseline", help="이번 결과를 기준값 JSON으로 저장")
+    parser.add_argument("--threshold", type=float, default=20.0, help="허용 회귀 비율(%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="비교에서 제외할 짧은 단계 기준(초)")
+    args = parser.parse_args(argv)
+
+    extractors = args.extractor or list(EXTRACTORS)
+    files = collect_files(args.paths)
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    sampler = StackSampler(args.interval) if args.profiler == "sample" else None
+    if sampler is not None:
+        sampler.start()
+    if args.memory:
+        tracemalloc.start()
+
+    records = []
+    try:
+        for file_path in files:
+            for extractor in extractors:
+                runs = [profile_file(file_path, extractor, args.profiler, sampler, args.memory, args.out, args.engine) for _ in range(max(1, args.repeat))]
+                records.append(min(runs, key=lambda r: r["seconds"]))
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if args.memory:
+            tracemalloc.stop()
+
+    summary = summarize(records)
+    print_table(records, summary)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        regressions = compare_baseline(summary, baseline, args.threshold, args.min_seconds)
+        for r in regressions:
+            print(f"[회귀] {r['stage']}: {r['baseline']:.4f}초 -> {r['current']:.4f}초 (+{r['change_pct']:.1f}%)")
+
+    report = {"files": records, "summary": summary, "regressions": regressions}
+    if args.out:
+        with open(os.path.join(args.out, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if sampler is not None:
+            sampler.write_collapsed(os.path.join(args.out, "stacks.collapsed"))
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary}, f, ensure_ascii=False, indent=2)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+필드별 검색 영역과 조기 종료 resolver
+- 검색 영역: {"rows": 50} (상단 50행), {"rows": [10, 80], "cols": 6} (10~79행, 왼쪽 6열) 처럼 지정
+- FieldResolver: 아직 확정되지 않은 필드만 행 블록 단위로 색인/검색하고, 모두 확정되면 스캔 중단
+
+기본은 시트 전체 검색입니다. 헤더 라벨이 인보이스 상단 블록에만 있는 거래처는
+TOP_BLOCK_REGION 프리셋(상단 50행)을 지정해 아래쪽 긴 품목 목록까지 스캔하지 않도록 할 수 있습니다.
+"""
+from fuzzy_match import NgramIndex, resolve_max_dist
+
+# 상단 블록만 검색하는 프리셋 (opt-in)
+TOP_BLOCK_REGION = {"rows": 50}
+
+def top_block_regions(fields, region=TOP_BLOCK_REGION):
+    """
+    필드마다 같은 검색 영역을 지정한 search_regions를 만듭니다.
+    사용 예: top_block_regions(["shipper", "consignee"])  -> {"shipper": {"rows": 50}, "consignee": {"rows": 50}}
+    """
+    return {field: dict(region) for field in fields}
+
+def region_range(spec, size):
+    """
+    rows/cols 설정을 (start, end)로 변환합니다.
+    None: 전체, int: 앞에서 N개, [start, end]: 범위 (end가 None이면 끝까지)
+    """
+    if spec is None:
+        return 0, size
+    if isinstance(spec, int):
+        return 0, min(spec, size)
+    start, end = spec
+    return max(0, start), size if end is None else min(end, size)
+
+def region_bounds(region, n_rows, n_cols):
+    # (row_start, row_end, col_start, col_end)
+    region = region or {}
+    return region_range(region.get("rows"), n_rows) + region_range(region.get("cols"), n_cols)
+
+def in_bounds(bounds, row_pos, col_idx):
+    row_start, row_end, col_start, col_end = bounds
+    return row_start <= row_pos < row_end and col_start <= col_idx < col_end
+
+class FieldResolver:
+    """
+    :param keyword_map: {field: [keyword, ...]} (앞의 키워드일수록 우선)
+    :param regions: {field: {"rows": ..., "cols": ...}} (없는 필드는 시트 전체)
+    :param normalize: 셀 값 -> 비교용 문자열
+    :param block_rows: 한 번에 색인할 행 수
+    """
+    def __init__(self, df, keyword_map, regions=None, normalize=None, max_dist=None, block_rows=25):
+        self.df = df
+        self.keyword_map = keyword_map
+        self.regions = regions or {}
+        self.normalize = normalize or (lambda v: str(v).lower())
+        self.max_dist = max_dist
+        self.block_rows = block_rows
+        self.rows_scanned = 0
+
+    def _find(self, index, keywords, bounds, exact):
+        """
+        블록 안에서 우선순위가 가장 높은 키워드의 첫 매칭 (영역 밖 셀은 제외)
+        :return: (순위, (keyword, (row_pos, col_idx), dist)) 또는 None
+                 순위 = (정확 매칭 0 / 오타 허용 1, 키워드 순서, 행, 열) - 작을수록 우선
+        """
+        for order, keyword in enumerate(keywords):
+            limit = 0 if exact else resolve_max_dist(keyword, self.max_dist)
+            if not exact and limit <= 0:
+                continue
+            for _, (row_pos, col_idx), dist in index.search(keyword, limit):
+                if in_bounds(bounds, row_pos, col_idx):
+                    return (0 if exact else 1, order, row_pos, col_idx), (keyword, (row_pos, col_idx), dist)
+        return None
+
+    def resolve(self, fields=None):
+        """
+        필드마다 (정확 매칭, 키워드 순서, 위치) 순으로 가장 좋은 매칭을 찾습니다. (영역 전체를 스캔한 것과 같은 결과)
+        첫 번째 키워드의 정확 매칭을 찾은 필드는 더 좋은 매칭이 없으므로 바로 확정하고,
+        그 밖의 필드는 후보를 들고 있다가 검색 영역을 다 지나면 확정합니다.
+        :param fields: 찾을 필드 목록 (None이면 keyword_map 전체)
+        :return: {field: (keyword, (row_pos, col_idx), dist)} - 못 찾은 필드는 빠짐
+        """
+        n_rows, n_cols = self.df.shape
+        fields = list(self.keyword_map) if fields is None else fields
+        pending = {field: region_bounds(self.regions.get(field), n_rows, n_cols) for field in fields}
+        pending = {field: bounds for field, bounds in pending.items() if bounds[0] < bounds[1] and bounds[2] < bounds[3]}
+        best = {}
+        if not pending:
+            return {}
+
+        row = min(bounds[0] for bounds in pending.values())
+        while True:
+            # 검색 영역을 다 지난 필드는 지금까지의 후보로 확정
+            pending = {field: bounds for field, bounds in pending.items() if bounds[1] > row}
+            if not pending:
+                break
+            row_end = max(bounds[1] for bounds in pending.values())
+            block_end = min(row + self.block_rows, row_end)
+            col_start = min(bounds[2] for bounds in pending.values())
+            col_end = max(bounds[3] for bounds in pending.values())
+
+            # 남은 필드들의 영역을 합친 범위만 색인
+            index = NgramIndex()
+            block = self.df.iloc[row:block_end, col_start:col_end]
+            columns = [block.iloc[:, i].tolist() for i in range(block.shape[1])]
+            for offset in range(block_end - row):
+                for i, values in enumerate(columns):
+                    index.add((row + offset, col_start + i), self.normalize(values[offset]))
+
+            for field in list(pending):
+                keywords = self.keyword_map[field]
+                match = self._find(index, keywords, pending[field], exact=True)
+                # 오타 허용 매칭은 시트 어디에도 정확 매칭이 없을 때만 사용
+                if match is None and (field not in best or best[field][0][0] == 1):
+                    match = self._find(index, keywords, pending[field], exact=False)
+                if match is not None and (field not in best or match[0] < best[field][0]):
+                    best[field] = match
+                if field in best and best[field][0][:2] == (0, 0):
+                    del pending[field]
+            row = block_end
+
+        self.rows_scanned = row
+        return {field: match for field, (_, match) in best.items()}
@@ -0,0 +1,409 @@
+"""
+공유 메모리 시트 프레임
+- 부모 프로세스가 워크북을 한 번만 읽고(read_grid) DataFrame 변환(grid_to_frame)과 문자열 변환(astype(str))까지 끝낸 뒤
+  그 결과를 multiprocessing.shared_memory 블록 하나에 열 단위로 기록
+- 워커는 블록 이름(handle)으로 붙어서 기록된 배열을 감싸기만 함 (워크북 재파싱/TextParser/셀별 디코딩/DataFrame pickle 없음)
+  - 문자열 뷰(.astype(str)): UTF-8 텍스트를 한 번 decode + split 해서 object 배열로 만듦
+  - 원본 뷰(xls.parse): 숫자 열은 numpy 버퍼를 그대로 복사하고,
+    object 열은 문자열 뷰를 복사한 뒤 문자열이 아닌 셀(타입 태그로 표시)만 덮어씀
+- 워커의 DataFrame은 워커 메모리에 만들어지므로(문자열은 파이썬 객체) 워커 수만큼 메모리와
+  셀 수에 비례하는 복사 시간은 여전히 듭니다. 셀별 파이썬 변환/파싱은 부모에서 한 번만 합니다.
+
+(시트, header) 프레임 하나 = [숫자 열 | object 열 tags(uint8) | object 열 values(int64) | 문자열 뷰 텍스트]
+
+사용 예:
+    with SharedWorkbook.publish("invoice.xlsx") as shared:
+        results = run_extractors(shared, ["all_fields", "table_value"], processes=2)
+
+    python shared_grid.py invoice.xlsx --extractor all_fields table_value --processes 2
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from excel_reader import grid_to_frame, open_workbook, read_grid
+
+# object 열 셀 타입 태그 (TAG_STR 셀은 문자열 뷰의 값을 그대로 씀)
+TAG_STR = 0
+TAG_INT = 1
+TAG_FLOAT = 2
+TAG_BOOL = 3
+TAG_DATETIME = 4
+TAG_DATE = 5
+TAG_TIME = 6
+TAG_TIMEDELTA = 7
+TAG_TIMESTAMP = 8
+TAG_PD_TIMEDELTA = 9
+TAG_BIGINT = 10
+TAG_NONE = 11
+TAG_NAT = 12
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# 문자열 뷰 셀 구분자 후보 (셀 값에 없는 첫 번째 문자를 사용)
+SEPARATORS = ["\x00", "\x1f", "\x1e", "\x1d"]
+
+# 워커 프로세스별 DataFrame 캐시 {공유 메모리 이름: {(시트, header, view): DataFrame}}
+_worker_frames = {}
+
+def align8(size):
+    return (size + 7) // 8 * 8
+
+def encode_cell(value):
+    """
+    object 열 셀 하나를 (tag, int64 값)으로 변환합니다.
+    날짜/큰 정수처럼 값이 8바이트에 들어가지 않는 타입은 문자열 뷰의 str(value)에서 복원합니다.
+    """
+    # bool은 int의 하위 타입이고, pd.Timestamp/NaT는 datetime의 하위 타입이므로 먼저 확인
+    if isinstance(value, str):
+        return TAG_STR, 0
+    if value is None:
+        return TAG_NONE, 0
+    if value is pd.NaT:
+        return TAG_NAT, 0
+    if isinstance(value, (bool, np.bool_)):
+        return TAG_BOOL, int(value)
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        # int64 범위를 넘는 정수(1e20 같은 숫자 셀)는 10진수 문자열에서 복원
+        if not INT64_MIN <= value <= INT64_MAX:
+            return TAG_BIGINT, 0
+        return TAG_INT, value
+    if isinstance(value, (float, np.floating)):
+        return TAG_FLOAT, np.float64(value).view(np.int64)
+    if isinstance(value, pd.Timestamp):
+        return TAG_TIMESTAMP, 0
+    if isinstance(value, datetime.datetime):
+        return TAG_DATETIME, 0
+    if isinstance(value, datetime.date):
+        return TAG_DATE, 0
+    if isinstance(value, datetime.time):
+        return TAG_TIME, 0
+    if isinstance(value, pd.Timedelta):
+        return TAG_PD_TIMEDELTA, value.value
+    if isinstance(value, datetime.timedelta):
+        return TAG_TIMEDELTA, value // datetime.timedelta(microseconds=1)
+    raise TypeError(f"공유 프레임에 저장할 수 없는 셀 타입입니다: {type(value).__name__}")
+
+def decode_cell(tag, value, text):
+    """
+    :param text: 문자열 뷰의 셀 값 (str(value))
+    """
+    if tag == TAG_STR:
+        return text
+    if tag == TAG_INT:
+        return int(value)
+    if tag == TAG_BIGINT:
+        return int(text)
+    if tag == TAG_FLOAT:
+        return float(np.int64(value).view(np.float64))
+    if tag == TAG_BOOL:
+        return bool(value)
+    if tag == TAG_NONE:
+        return None
+    if tag == TAG_NAT:
+        return pd.NaT
+    if tag == TAG_TIMESTAMP:
+        return pd.Timestamp(text)
+    if tag == TAG_DATETIME:
+        return datetime.datetime.fromisoformat(text)
+    if tag == TAG_DATE:
+        return datetime.date.fromisoformat(text)
+    if tag == TAG_TIME:
+        return datetime.time.fromisoformat(text)
+    if tag == TAG_PD_TIMEDELTA:
+        return pd.Timedelta(int(value))
+    return datetime.timedelta(microseconds=int(value))
+
+def encode_frame(df):
+    """
+    DataFrame 하나를 공유 메모리에 기록할 배열로 변환합니다.
+    :return: (meta, [numpy 배열 / bytes, ...]) - 배열은 기록 순서대로
+    """
+    n_rows, n_cols = df.shape
+    kinds = []
+    numeric = []
+    objects = []
+    for col_idx in range(n_cols):
+        values = df.iloc[:, col_idx]
+        dtype = values.dtype
+        if dtype == object:
+            kinds.append("object")
+            objects.append(values.tolist())
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+            kinds.append(dtype.str)
+            numeric.append(np.ascontiguousarray(values.to_numpy()))
+        else:
+            raise TypeError(f"공유 프레임에 저장할 수 없는 열 타입입니다: {dtype}")
+
+    tags = np.zeros((len(objects), n_rows), dtype=np.uint8)
+    numbers = np.zeros((len(objects), n_rows), dtype=np.int64)
+    for obj_idx, column in enumerate(objects):
+        for row_idx, value in enumerate(column):
+            tags[obj_idx, row_idx], numbers[obj_idx, row_idx] = encode_cell(value)
+
+    # 문자열 뷰는 행 우선 순서로 이어 붙임
+    cells = df.astype(str).to_numpy().ravel().tolist()
+    for sep in SEPARATORS:
+        joined = sep.join(cells)
+        if joined.count(sep) == max(len(cells) - 1, 0):
+            break
+    else:
+        raise ValueError("문자열 뷰에 쓸 수 있는 구분자가 없습니다.")
+    text = joined.encode("utf-8")
+
+    meta = {
+        "shape": [n_rows, n_cols],
+        "index": df.index,
+        "columns": df.columns,
+        "kinds": kinds,
+        "sep": sep,
+        "text_bytes": len(text),
+    }
+    return meta, numeric + [tags, numbers, text]
+
+class SharedFrame:
+    """
+    공유 메모리 위의 (시트, header) 프레임 하나
+    str_frame()/raw_frame()은 호출마다 새 DataFrame을 만듦 (공유 메모리를 참조하지 않는 복사본)
+    """
+    def __init__(self, buf, meta, info):
+        self.meta = meta
+        self.info = info
+        self.shape = tuple(meta["shape"])
+        n_rows, n_cols = self.shape
+        n_objects = meta["kinds"].count("object")
+        start = meta["start"]
+        self.numeric = []
+        for kind in meta["kinds"]:
+            if kind != "object":
+                dtype = np.dtype(kind)
+                self.numeric.append((dtype, start))
+                start += align8(dtype.itemsize * n_rows)
+        self.tags_start = start
+        start += align8(n_objects * n_rows)
+        self.values_start = start
+        start += 8 * n_objects * n_rows
+        self.text_start = start
+        self._buf = buf
+
+    def cells(self):
+        # 문자열 뷰 셀 (n_rows x n_cols object 배열)
+        n_rows, n_cols = self.shape
+        cells = np.empty(n_rows * n_cols, dtype=object)
+        if cells.size:
+            text = str(self._buf[self.text_start:self.text_start + self.meta["text_bytes"]], "utf-8")
+            cells[:] = text.split(self.meta["sep"])
+        return cells.reshape(n_rows, n_cols)
+
+    def str_frame(self):
+        df = pd.DataFrame(self.cells(), index=self.meta["index"], columns=self.meta["columns"])
+        df.attrs.update(self.info)
+        return df
+
+    def raw_frame(self):
+        n_rows, n_cols = self.shape
+        if n_cols == 0:
+            df = pd.DataFrame(index=self.meta["index"], columns=self.meta["columns"])
+            df.attrs.update(self.info)
+            return df
+        n_objects = self.meta["kinds"].count("object")
+        tags = np.frombuffer(self._buf, dtype=np.uint8, count=n_objects * n_rows, offset=self.tags_start).reshape(n_objects, n_rows)
+        values = np.frombuffer(self._buf, dtype=np.int64, count=n_objects * n_rows, offset=self.values_start).reshape(n_objects, n_rows)
+        cells = self.cells() if n_objects else None
+        numeric = iter(self.numeric)
+        columns = {}
+        obj_idx = 0
+        for col_idx, kind in enumerate(self.meta["kinds"]):
+            if kind == "object":
+                columns[col_idx] = self.decode_column(cells[:, col_idx].copy(), tags[obj_idx], values[obj_idx])
+                obj_idx += 1
+            else:
+                dtype, start = next(numeric)
+                columns[col_idx] = np.frombuffer(self._buf, dtype=dtype, count=n_rows, offset=start).copy()
+        df = pd.DataFrame(columns, index=self.meta["index"])
+        df.columns = self.meta["columns"]
+        df.attrs.update(self.info)
+        return df
+
+    @staticmethod
+    def decode_column(column, tags, values):
+        # 문자열 뷰 값(str(value))을 원래 값으로 되돌림 (문자열 셀은 그대로)
+        for tag in np.unique(tags[tags != TAG_STR]):
+            positions = np.flatnonzero(tags == tag)
+            if tag == TAG_INT:
+                column[positions] = values[positions].tolist()
+            elif tag == TAG_FLOAT:
+                column[positions] = values[positions].view(np.float64).tolist()
+            elif tag == TAG_BOOL:
+                column[positions] = (values[positions] != 0).tolist()
+            else:
+                for pos in positions:
+                    column[pos] = decode_cell(tag, values[pos], column[pos])
+        return column
+
+class SharedWorkbook:
+    """
+    open_workbook()과 같은 sheet_names / parse()와 pipeline.SheetStore와 같은 frame()을 제공하는 공유 메모리 워크북
+    - publish(): 부모 프로세스에서 생성 (공유 메모리 소유, 끝나면 unlink)
+    - attach(handle): 워커에서 연결
+    """
+    def __init__(self, shm, handle, owner, frames=None):
+        self._shm = shm
+        self.handle = handle
+        self.owner = owner
+        self._frames = {} if frames is None else frames
+        self.file_path = handle["file_path"]
+        self.sheet_names = list(handle["sheets"])
+        self._shared = {
+            (sheet_name, header): SharedFrame(shm.buf, meta, sheet["info"])
+            for sheet_name, sheet in handle["sheets"].items()
+            for header, meta in sheet["frames"].items()
+        }
+
+    @classmethod
+    def publish(cls, file_path, engine=None, sheet_names=None, headers=(0, None), **limits):
+        """
+        워크북의 시트를 DataFrame으로 변환해 공유 메모리에 기록합니다.
+        :param sheet_names: 기록할 시트 (None이면 전체)
+        :param headers: 기록할 header 값 (xls.parse의 header, 추출기는 0과 None을 사용)
+        :param limits: open_workbook의 읽기 한도 (max_cells, max_seconds, max_empty_rows, trim_leading)
+        """
+        xls = open_workbook(file_path, engine=engine, **limits)
+        sheets = {}
+        arrays = []
+        size = 0
+        for sheet_name in sheet_names or xls.sheet_names:
+            data, info = read_grid(xls.iter_rows(sheet_name), sheet_name=sheet_name, **xls.limits)
+            frames = {}
+            for header in headers:
+                meta, parts = encode_frame(grid_to_frame(data, header))
+                meta["start"] = size
+                for part in parts:
+                    arrays.append((size, part))
+                    size += align8(len(part) if isinstance(part, bytes) else part.nbytes)
+                frames[header] = meta
+            sheets[sheet_name] = {"info": info, "frames": frames}
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for start, part in arrays:
+            data = part if isinstance(part, bytes) else part.tobytes()
+            shm.buf[start:start + len(data)] = data
+
+        handle = {"name": shm.name, "file_path": file_path, "sheets": sheets}
+        return cls(shm, handle, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        워커에서 연결합니다. 같은 워커가 같은 워크북의 작업을 다시 받으면 만들어 둔 DataFrame을 재사용합니다.
+        """
+        name = handle["name"]
+        # 다른 워크북의 캐시는 버림 (워커당 워크북 하나만 유지)
+        for other in [other for other in _worker_frames if other != name]:
+            del _worker_frames[other]
+        return cls(shared_memory.SharedMemory(name=name), handle, owner=False, frames=_worker_frames.setdefault(name, {}))
+
+    def frame(self, sheet_name, header=0, view="raw"):
+        """
+        (시트, header, view)별 DataFrame을 한 번만 만들어 캐시합니다. (pipeline.SheetStore.frame과 같은 view)
+        받은 DataFrame은 수정하지 않아야 합니다.
+        """
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"시트를 찾을 수 없습니다: {sheet_name}")
+        if (sheet_name, header) not in self._shared:
+            raise ValueError(f"공유 메모리에 기록하지 않은 header입니다: {header}")
+        key = (sheet_name, header, view)
+        if key not in self._frames:
+            shared = self._shared[(sheet_name, header)]
+            if view == "raw":
+                df = shared.raw_frame()
+            elif view == "str":
+                df = shared.str_frame()
+            elif view == "str_filled":
+                df = self.frame(sheet_name, header, "str").fillna('')
+            else:
+                raise ValueError(f"지원하지 않는 view입니다: {view}")
+            self._frames[key] = df
+        return self._frames[key]
+
+    def parse(self, sheet_name, header=0):
+        """
+        xls.parse()와 같은 DataFrame (호출마다 복사본 반환)
+        """
+        return self.frame(sheet_name, header).copy()
+
+    def close(self):
+        # 만든 DataFrame은 모두 복사본이므로 공유 메모리를 바로 닫을 수 있음
+        self._shared = {}
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def run_extractor(handle, extractor):
+    """
+    워커에서 공유 워크북에 붙어 추출기 하나를 실행합니다.
+    :return: (결과, 단계별 시간)
+    """
+    from profile_extractors import EXTRACTORS, StageRecorder
+
+    recorder = StageRecorder()
+    with recorder.stage("load"):
+        shared = SharedWorkbook.attach(handle)
+    try:
+        # 추출기의 디버그 print는 출력하지 않음
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = EXTRACTORS[extractor](shared, recorder)
+    finally:
+        shared.close()
+    return result, {stage: stat["seconds"] for stage, stat in recorder.stages.items()}
+
+def run_extractors(shared, extractors, processes=None):
+    """
+    공유 워크북 하나에 대해 여러 추출기를 프로세스별로 병렬 실행합니다.
+    :return: {extractor: {"result": ..., "seconds": {stage: 초}}}
+    """
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {name: pool.submit(run_extractor, shared.handle, name) for name in extractors}
+        results = {}
+        for name, future in futures.items():
+            result, seconds = future.result()
+            results[name] = {"result": result, "seconds": seconds}
+    return results
+
+if __name__ == "__main__":
+    from profile_extractors import EXTRACTORS
+
+    parser = argparse.ArgumentParser(description="워크북을 한 번 읽어 공유 메모리로 여러 추출기 병렬 실행")
+    parser.add_argument("file", help="엑셀/CSV 파일")
+    parser.add_argument("--extractor", nargs="+", choices=sorted(EXTRACTORS), default=sorted(EXTRACTORS))
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--engine", default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with SharedWorkbook.publish(args.file, engine=args.engine) as shared:
+        publish_seconds = time.perf_counter() - start
+        results = run_extractors(shared, args.extractor, args.processes)
+    print(f"공유 메모리 기록: {publish_seconds:.3f}초 ({shared.handle['name']})")
+    for name, item in results.items():
+        stages = ", ".join(f"{stage} {seconds:.3f}초" for stage, seconds in item["seconds"].items())
+        print(f"[{name}] {stages}")
+    json.dump({name: item["result"] for name, item in results.items()}, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    print()
@@ -0,0 +1,260 @@
+"""
+.xlsx 시트 사전 선별 (zip 수준)
+- DataFrame을 만들기 전에 공유 문자열 표(sharedStrings, 위치는 관계 파일로 확인)를 한 번 읽어 설정된 키워드와 매칭
+- 각 시트 XML에서는 문자열 셀의 공유 문자열 번호(와 인라인 문자열)만 확인해, 매칭된 문자열을 참조하는 시트만 남김
+- 관련 라벨이 하나도 없는 워크북은 파싱 없이 제외, 일부 시트에만 있으면 그 시트만 파싱
+
+매칭은 추출기보다 넓게(놓치지 않게) 합니다.
+- 소문자 부분 문자열 + 추출기와 같은 오타 허용 규칙(fuzzy_match.resolve_max_dist)
+- 공백으로 나뉜 키워드(invoice no 등)는 각 단어가 시트 어딘가에 있으면 매칭 (행 단위로 이어 붙여 찾는 추출기 대비)
+
+사용 예:
+    screen = prescreen("invoice.xlsx")
+    if screen is not None and not screen:
+        print("관련 라벨 없음")
+    sheets = relevant_sheets("invoice.xlsx")  # None이면 선별 불가(.xls/.csv 등) -> 전체 파싱
+"""
+import html
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+from extract_all_fields import KEYWORD_MAP, MULTILINE_KEYWORDS
+from find_single_value import TARGETS
+from fuzzy_match import NgramIndex, resolve_max_dist
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT_REL_TYPE = "/officeDocument"
+WORKSHEET_REL_TYPE = "/worksheet"
+SHARED_STRINGS_REL_TYPE = "/sharedStrings"
+
+PRESCREEN_EXTENSIONS = (".xlsx", ".xlsm")
+
+# 시트 XML 스캔용
+TYPE_RE = re.compile(rb'\bt="([^"]*)"')
+V_RE = re.compile(rb"<v>(.*?)</v>", re.S)
+T_RE = re.compile(rb"<t(?:\s[^>]*)?>(.*?)</t>", re.S)
+RPH_RE = re.compile(rb"<rPh\b.*?</rPh>", re.S)
+CHUNK_SIZE = 1024 * 1024
+
+# 추출기에서 사용하는 라벨 키워드 전체
+TABLE_KEYWORDS = ["case no", "c/t no"]
+DEFAULT_KEYWORDS = list(dict.fromkeys(
+    MULTILINE_KEYWORDS
+    + [keyword for keywords in KEYWORD_MAP.values() for keyword in keywords]
+    + [keyword for target in TARGETS.values() for keyword in target["keywords"]]
+    + TABLE_KEYWORDS
+))
+
+def normalize_text(text):
+    return text.lower().strip()
+
+def text_variants(text):
+    # extract_all_fields.normalize_label처럼 콜론을 뺀 형태도 함께 비교
+    text = normalize_text(text)
+    stripped = text.replace("：", "").replace(":", "")
+    return [text] if stripped == text else [text, stripped]
+
+def element_text(element):
+    """
+    <si> / <is> 요소의 텍스트 (서식 있는 텍스트는 run을 이어 붙이고, 후리가나 <rPh>는 제외)
+    """
+    parts = []
+    for child in element:
+        if child.tag == MAIN_NS + "t":
+            parts.append(child.text or "")
+        elif child.tag == MAIN_NS + "r":
+            parts.extend(t.text or "" for t in child.iter(MAIN_NS + "t"))
+    return "".join(parts)
+
+def part_rels(archive, part):
+    """
+    part(zip 안 경로, 패키지 루트는 "")의 관계 파일을 읽습니다.
+    :return: {Id: (Type, 대상 zip 안 경로)} (관계 파일이 없으면 KeyError)
+    """
+    folder, name = posixpath.split(part)
+    rels = {}
+    with archive.open(posixpath.join(folder, "_rels", name + ".rels")) as f:
+        for rel in ET.parse(f).getroot().iter(PKG_REL_NS + "Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target")
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get("Id")] = (rel.get("Type", ""), path)
+    return rels
+
+def rel_paths(rels, rel_type):
+    return [path for type_, path in rels.values() if type_.endswith(rel_type)]
+
+def workbook_part(archive):
+    # 패키지 관계에서 통합문서 본문 경로 (보통 xl/workbook.xml)
+    paths = rel_paths(part_rels(archive, ""), OFFICE_DOCUMENT_REL_TYPE)
+    if not paths:
+        raise KeyError("officeDocument")
+    return paths[0]
+
+def read_shared_strings(archive, path):
+    """
+    :param path: 공유 문자열 표 경로 (None이면 공유 문자열 없음)
+    """
+    strings = []
+    if path is None:
+        return strings
+    with archive.open(path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == MAIN_NS + "si":
+                strings.append(element_text(element))
+                element.clear()
+    return strings
+
+def workbook_sheets(archive, workbook_path, rels):
+    """
+    :return: [(시트 이름, zip 안 경로), ...] (워크시트만, 통합문서 순서)
+    """
+    sheet_paths = {rel_id: path for rel_id, (type_, path) in rels.items() if type_.endswith(WORKSHEET_REL_TYPE)}
+    with archive.open(workbook_path) as f:
+        sheets = ET.parse(f).getroot().iter(MAIN_NS + "sheet")
+        return [(sheet.get("name"), sheet_paths[sheet.get(REL_NS + "id")]) for sheet in sheets if sheet.get(REL_NS + "id") in sheet_paths]
+
+def match_keywords(texts, keywords, max_dist=None):
+    """
+    :param texts: {key: 원문 문자열}
+    :return: {keyword: 매칭된 key 집합} (매칭이 없는 키워드는 빠짐)
+    """
+    index = NgramIndex()
+    for key, text in texts.items():
+        for variant in text_variants(text):
+            index.add(key, variant)
+    matched = {}
+    for keyword in keywords:
+        hits = {key for _, key, _ in index.search(keyword, resolve_max_dist(keyword, max_dist))}
+        if hits:
+            matched[keyword] = hits
+    return matched
+
+def inline_text(body):
+    # <is> 안의 텍스트 (후리가나 <rPh> 제외, XML 엔티티 복원)
+    body = RPH_RE.sub(b"", body)
+    return html.unescape(b"".join(T_RE.findall(body)).decode("utf-8"))
+
+def sheet_string_refs(archive, path, chunk_size=CHUNK_SIZE):
+    """
+    시트가 참조하는 공유 문자열 번호와 인라인/수식 결과 문자열을 읽습니다.
+    서식만 적용된 빈 셀(<c .../>)이 수십만 개인 시트도 있으므로 XML 파서 대신
+    값이 있는 셀의 닫는 태그(</c>)만 찾아 그 셀의 여는 태그까지 거슬러 읽습니다.
+    :return: (공유 문자열 번호 집합, 인라인 문자열 목록)
+    """
+    refs = set()
+    inline = []
+    buffer = b""
+    with archive.open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            pos = 0
+            while True:
+                end = buffer.find(b"</c>", pos)
+                if end < 0:
+                    break
+                # 셀 본문(<v>, <f>, <is>)에는 "<c"로 시작하는 태그가 없으므로 가장 가까운 "<c"가 여는 태그
+                start = buffer.rfind(b"<c", pos, end)
+                tag_end = buffer.find(b">", start, end)
+                pos = end + 4
+                if start < 0 or tag_end < 0:
+                    continue
+                cell_type = TYPE_RE.search(buffer, start, tag_end)
+                cell_type = cell_type.group(1) if cell_type else None
+                body = buffer[tag_end + 1:end]
+                if cell_type == b"s":
+                    value = V_RE.search(body)
+                    if value and value.group(1).strip().isdigit():
+                        refs.add(int(value.group(1)))
+                elif cell_type == b"inlineStr":
+                    inline.append(inline_text(body))
+                elif cell_type == b"str":
+                    value = V_RE.search(body)
+                    if value:
+                        inline.append(html.unescape(value.group(1).decode("utf-8")))
+            if not chunk:
+                break
+            # 청크 끝에 걸린 미완성 셀(마지막 "<c" 이후)은 다음 청크와 이어서 검사
+            start = buffer.rfind(b"<c", pos)
+            buffer = buffer[start:] if start >= 0 else buffer[max(pos, len(buffer) - 3):]
+    return refs, inline
+
+def sheet_keywords(keywords, refs, shared_matches, inline_matches):
+    """
+    시트 하나에서 매칭된 키워드 집합 (공백이 있는 키워드는 단어별 매칭도 인정)
+    """
+    def present(keyword):
+        return bool(refs & shared_matches.get(keyword, set()) or inline_matches.get(keyword))
+
+    found = set()
+    for keyword in keywords:
+        words = keyword.split()
+        if present(keyword) or (len(words) > 1 and all(present(word) for word in words)):
+            found.add(keyword)
+    return found
+
+def prescreen(file_path, keywords=None, max_dist=None):
+    """
+    시트별로 매칭된 키워드를 반환합니다.
+    :param keywords: 찾을 키워드 (None이면 DEFAULT_KEYWORDS)
+    :return: {시트 이름: 매칭된 키워드 집합} (키워드가 없는 시트는 빠짐),
+             .xlsx가 아니거나 zip 구조를 읽을 수 없으면 None (호출 측에서 전체 파싱)
+    """
+    if not file_path.lower().endswith(PRESCREEN_EXTENSIONS) or not zipfile.is_zipfile(file_path):
+        return None
+    keywords = [normalize_text(keyword) for keyword in (DEFAULT_KEYWORDS if keywords is None else keywords)]
+    # 단어별 매칭에 쓰는 단어도 함께 찾음
+    search_terms = list(dict.fromkeys(keywords + [word for keyword in keywords if " " in keyword for word in keyword.split()]))
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            # 부품 경로는 관계 파일로 확인 (이름이 다르거나 관계가 가리키는 부품이 없으면 KeyError -> None)
+            workbook_path = workbook_part(archive)
+            rels = part_rels(archive, workbook_path)
+            shared_paths = rel_paths(rels, SHARED_STRINGS_REL_TYPE)
+            shared = read_shared_strings(archive, shared_paths[0] if shared_paths else None)
+            shared_matches = match_keywords(dict(enumerate(shared)), search_terms, max_dist)
+            result = {}
+            for sheet_name, path in workbook_sheets(archive, workbook_path, rels):
+                refs, inline = sheet_string_refs(archive, path)
+                inline_matches = match_keywords(dict(enumerate(inline)), search_terms, max_dist) if inline else {}
+                found = sheet_keywords(keywords, refs, shared_matches, inline_matches)
+                if found:
+                    result[sheet_name] = found
+    except (KeyError, ET.ParseError, UnicodeDecodeError, zipfile.BadZipFile):
+        return None
+    return result
+
+def relevant_sheets(file_path, keywords=None, max_dist=None):
+    """
+    키워드가 있는 시트 이름 목록 (통합문서 순서), 선별할 수 없으면 None
+    """
+    screen = prescreen(file_path, keywords, max_dist)
+    return None if screen is None else list(screen)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from profile_extractors import collect_files
+
+    parser = argparse.ArgumentParser(description=".xlsx 시트 사전 선별 (키워드가 있는 시트만 표시)")
+    parser.add_argument("paths", nargs="+", help="엑셀 파일 또는 폴더")
+    args = parser.parse_args()
+
+    for file_path in collect_files(args.paths):
+        start = time.perf_counter()
+        screen = prescreen(file_path)
+        elapsed = (time.perf_counter() - start) * 1000
+        if screen is None:
+            print(f"{file_path}: 선별 불가 (전체 파싱), {elapsed:.1f}ms")
+        elif not screen:
+            print(f"{file_path}: 관련 라벨 없음, {elapsed:.1f}ms")
+        else:
+            for sheet_name, found in screen.items():
+                print(f"{file_path} [{sheet_name}]: {', '.join(sorted(found))}, {elapsed:.1f}ms")